@@ -0,0 +1,250 @@
+"""Dashboard aggregates memoized per dataset version"""
+import copy
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+import pandas as pd
+
+from sketches import DEFAULT_HLL_PRECISION, HyperLogLog, SpaceSaving, TDigest
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+def new_dataset_version():
+    """Opaque version token for data that has no content hash (e.g. generated data)"""
+    return uuid.uuid4().hex
+
+
+def dataset_fingerprint(df):
+    """Content fingerprint of a DataFrame; O(rows), so compute it once per dataset"""
+    return format(int(pd.util.hash_pandas_object(df, index=False).sum()), '016x')
+
+
+class AggregateCache:
+    """Thread-safe LRU cache of aggregates keyed by ``(dataset version, name, params)``
+
+    Each aggregate is computed once per dataset version; widget-only reruns
+    are served from memory. The least recently used entries are evicted
+    once ``max_entries`` is exceeded.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, version, name, compute, df, **params):
+        """Return the cached aggregate, computing ``compute(df, **params)`` on a miss"""
+        key = (version, name, tuple(sorted(params.items())))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # Compute outside the lock so other sessions are not blocked
+        value = compute(df, **params)
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def __len__(self):
+        return len(self._entries)
+
+
+COUNTER_COLUMNS = ['content_id', 'device_type', 'location']
+CONTENT_STATS = ['watch_time_sum', 'watch_time_count', 'completed']
+
+
+class FrozenViewers:
+    """Exact distinct-viewer count of a published ``RunningAggregates`` view
+
+    The live id set is referenced, not copied, so that an ingestor started
+    from the view can take the ids over with ``thaw``; it is never read
+    for counting, so later additions to it do not change the view.
+    """
+
+    def __init__(self, viewers):
+        self.count = len(viewers)
+        self.source = viewers.source if isinstance(viewers, FrozenViewers) else viewers
+
+    def __len__(self):
+        return self.count
+
+
+class RunningAggregates:
+    """Mergeable running totals behind the KPIs and the per-key breakdowns
+
+    ``update`` folds in a batch of new rows in time proportional to the
+    batch, so appended events never trigger a rescan of the history.
+    ``merge`` combines totals built over disjoint partitions. With
+    ``approx_viewers`` distinct viewers are tracked in a HyperLogLog sketch
+    of the given ``precision`` instead of an exact set of ids. With
+    ``top_k`` only that many titles are tracked, in a Space-Saving summary,
+    so memory stays bounded for very large catalogs.
+    """
+
+    def __init__(self, approx_viewers=False, precision=DEFAULT_HLL_PRECISION, top_k=None):
+        self.rows = 0
+        self.viewers = HyperLogLog(precision) if approx_viewers else set()
+        self.has_user_id = True
+        self.watch_time_sum = 0.0
+        self.watch_time_count = 0
+        self.completed = 0
+        # Streaming quantiles of watch time for the drop-off buckets
+        self.watch_time_digest = TDigest()
+        # Per-title sums behind the trending table: exact, or heavy hitters only
+        self.top_titles = SpaceSaving(top_k, CONTENT_STATS) if top_k else None
+        self.counters = {col: Counter() for col in COUNTER_COLUMNS if not (top_k and col == 'content_id')}
+        self.content_stats = {name: Counter() for name in CONTENT_STATS} if not top_k else {}
+
+    @property
+    def approx_viewers(self):
+        return isinstance(self.viewers, HyperLogLog)
+
+    @property
+    def top_k(self):
+        return self.top_titles.capacity if self.top_titles is not None else None
+
+    @classmethod
+    def from_frame(cls, df, **options):
+        running = cls(**options)
+        running.update(df)
+        return running
+
+    def view(self):
+        """Read-only copy of the totals, for publishing while these keep being updated
+
+        Costs time in the number of distinct titles, devices and locations,
+        never in rows or distinct viewers: exact viewer ids are summarized by
+        their count. Digest and Space-Saving arrays are replaced rather than
+        modified on update, so they are shared.
+        """
+        view = copy.copy(self)
+        view.viewers = self.viewers.copy() if self.approx_viewers else FrozenViewers(self.viewers)
+        view.counters = {col: counter.copy() for col, counter in self.counters.items()}
+        view.content_stats = {name: counter.copy() for name, counter in self.content_stats.items()}
+        view.watch_time_digest = copy.copy(self.watch_time_digest)
+        view.top_titles = copy.copy(self.top_titles)
+        return view
+
+    def thaw(self):
+        """Updatable copy of these totals (or of a view), taking over exact viewer ids"""
+        running = self.view()
+        if not self.approx_viewers:
+            viewers = self.viewers.source if isinstance(self.viewers, FrozenViewers) else self.viewers
+            running.viewers = set(viewers)
+        return running
+
+    def update(self, delta):
+        """Merge a batch of newly arrived rows into the running totals"""
+        if len(delta) == 0:
+            return self
+        self.rows += len(delta)
+        if 'user_id' in delta.columns:
+            if self.approx_viewers:
+                self.viewers.update(delta['user_id'])
+            else:
+                self.viewers.update(delta['user_id'].unique().tolist())
+        else:
+            self.has_user_id = False
+        watch_time = delta['watch_time']
+        self.watch_time_sum += float(watch_time.sum())
+        self.watch_time_count += int(watch_time.count())
+        self.watch_time_digest.update(watch_time.to_numpy())
+        completed = delta['is_completed'].astype(bool)
+        self.completed += int(completed.sum())
+        for col, counter in self.counters.items():
+            counts = delta[col].value_counts()
+            counter.update(counts[counts > 0].to_dict())
+
+        if self.top_titles is not None:
+            self.top_titles.update(delta['content_id'].to_numpy(),
+                                   watch_time_sum=watch_time.fillna(0).to_numpy(),
+                                   watch_time_count=watch_time.notna().to_numpy(),
+                                   completed=completed.to_numpy())
+            return self
+        stats = pd.DataFrame({'watch_time': watch_time, 'completed': completed}).groupby(
+            delta['content_id'], observed=True
+        ).agg(
+            watch_time_sum=('watch_time', 'sum'),
+            watch_time_count=('watch_time', 'count'),
+            completed=('completed', 'sum'),
+        )
+        for name, counter in self.content_stats.items():
+            counter.update(stats[name].to_dict())
+        return self
+
+    def merge(self, other):
+        """Fold in totals computed over a disjoint set of rows"""
+        self.rows += other.rows
+        if self.approx_viewers:
+            self.viewers.merge(other.viewers)
+        else:
+            self.viewers |= other.viewers
+        self.has_user_id = self.has_user_id and other.has_user_id
+        self.watch_time_sum += other.watch_time_sum
+        self.watch_time_count += other.watch_time_count
+        self.watch_time_digest.merge(other.watch_time_digest)
+        self.completed += other.completed
+        for col, counter in self.counters.items():
+            counter.update(other.counters[col])
+        for name, counter in self.content_stats.items():
+            counter.update(other.content_stats[name])
+        if self.top_titles is not None:
+            self.top_titles.merge(other.top_titles)
+        return self
+
+    def kpis(self):
+        """Total viewers, average watch time and completion rate"""
+        total_viewers = len(self.viewers) if self.has_user_id else self.rows
+        return {
+            'total_viewers': total_viewers,
+            # Relative standard error of total_viewers (0 when exact)
+            'viewers_error': self.viewers.relative_error if self.approx_viewers and self.has_user_id else 0.0,
+            'avg_watch_time': self.watch_time_sum / self.watch_time_count if self.watch_time_count else float('nan'),
+            'completion_rate': (self.completed / self.rows) * 100 if self.rows else 0.0,
+        }
+
+    def counts(self, column):
+        """Row counts per distinct value of ``column``, largest first"""
+        if column == 'content_id' and self.top_titles is not None:
+            # Upper bounds for the monitored titles only
+            counts = self.top_titles.table['count'].astype('int64').rename(None)
+        else:
+            counts = pd.Series(self.counters[column], dtype='int64')
+        return counts.sort_values(ascending=False, kind='stable')
+
+    def content_table(self):
+        """Average watch time, completion rate and view count per title
+
+        ``error`` is how far ``count`` may overestimate the true count (0 when
+        titles are tracked exactly).
+        """
+        if self.top_titles is not None:
+            stats = self.top_titles.table
+            count = stats['count'].astype('int64')
+            error = stats['error'].astype('int64')
+            # The per-title sums cover only the count - error rows seen while the title was monitored
+            observed = count - error
+        else:
+            stats = pd.DataFrame({name: pd.Series(counter, dtype='float64')
+                                  for name, counter in self.content_stats.items()})
+            count = pd.Series(self.counters['content_id'], dtype='int64').reindex(stats.index, fill_value=0)
+            error = pd.Series(0, index=stats.index, dtype='int64')
+            observed = count
+        table = pd.DataFrame({
+            'watch_time': stats['watch_time_sum'] / stats['watch_time_count'],
+            'is_completed': stats['completed'] / observed,
+            'count': count,
+            'error': error,
+        })
+        table.index.name = 'content_id'
+        return table
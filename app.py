@@ -1,15 +1,28 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 from datetime import datetime, timedelta
 import time
 import altair as alt
 from PIL import Image
 import io
-from fpdf import FPDF
 import base64
+from ingestion import (DEFAULT_CHUNK_SIZE, SCHEMA_VERSION, validate_columns, normalize_dataset, analyze_dataset,
+                       read_csv_chunked, excel_sheet_names, read_excel_streaming,
+                       compact_dataset, memory_footprint, as_frame)
+from dataset_cache import DatasetCache, content_key
+from generator import generate_events
+from aggregates import AggregateCache, new_dataset_version, dataset_fingerprint
+from engine import (DEFAULT_VELOCITY_MINUTES, MAX_MAP_FRAMES, build_dashboard, kpi_section, map_frames_section, memoized,
+                    select_trending, window_section)
+from parallel import default_workers, parallel_aggregate
+from sketches import DEFAULT_HLL_PRECISION, DEFAULT_TOP_K_CAPACITY
+from reports import submit_report
+from windows import WindowedMetrics
+from sources import DEFAULT_LISTEN_PORT, EventListener, FileTailSource
+from snapshots import DEFAULT_REFRESH_SECONDS, Snapshot, SnapshotIngestor
+from figures import (FigureCache, FigureStats, content_pie, device_pie, dropoff_chart, location_map, region_bar,
+                     with_animation_speed)
 
 # Page configuration
 st.set_page_config(
@@ -286,17 +299,29 @@ st.markdown("""
 # Mock data generation function
 def get_mock_data():
     """Generate mock data if no file is uploaded"""
-    current_time = datetime.now()
-    data = {
-        'user_id': range(1, 1001),
-        'content_id': np.random.choice(['Show_A', 'Show_B', 'Show_C', 'Show_D', 'Show_E'], 1000),
-        'timestamp': [current_time - timedelta(minutes=np.random.randint(0, 60)) for _ in range(1000)],
-        'watch_time': np.random.normal(30, 10, 1000),
-        'device_type': np.random.choice(['mobile', 'tablet', 'tv', 'web'], 1000),
-        'location': np.random.choice(['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix'], 1000),
-        'is_completed': np.random.choice([True, False], 1000, p=[0.7, 0.3])
-    }
-    return pd.DataFrame(data)
+    return generate_events(
+        1000,
+        contents=['Show_A', 'Show_B', 'Show_C', 'Show_D', 'Show_E'],
+        locations=['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix'],
+        n_users=None,
+        span=timedelta(minutes=60),
+        zipf_a=0,
+    )
+
+# KPI windows (minutes of most recent events; None covers the whole dataset)
+KPI_WINDOWS = {"All time": None, "Last 5 min": 5, "Last 15 min": 15, "Last 60 min": 60}
+
+# Trending card rankings
+TRENDING_MODES = {"Average watch time": 'watch_time', "Trend velocity": 'velocity'}
+
+# Drop-off chart resolutions (number of watch-time quantile buckets)
+DROPOFF_RESOLUTIONS = {"Deciles": 10, "Ventiles": 20, "Percentiles": 100}
+
+# Map animation frame sizes
+MAP_FRAME_RESOLUTIONS = {"Hour": "hour", "Day": "day"}
+
+# How often a pending background report is checked for completion
+REPORT_POLL_SECONDS = 1
 
 # Initialize session state
 if 'data' not in st.session_state:
@@ -309,73 +334,217 @@ if 'validated' not in st.session_state:
     st.session_state.validated = False
 if 'validation_message' not in st.session_state:
     st.session_state.validation_message = ""
+if 'upload_keys' not in st.session_state:
+    st.session_state.upload_keys = {}
+if 'upload_sheets' not in st.session_state:
+    # Worksheet names per uploaded workbook
+    st.session_state.upload_sheets = {}
+if 'upload_frame' not in st.session_state:
+    st.session_state.upload_frame = None
+if 'data_version' not in st.session_state:
+    # (id of the loaded DataFrame, version token) used to key memoized aggregates
+    st.session_state.data_version = None
+if 'running' not in st.session_state:
+    # ((version, options), RunningAggregates) maintained incrementally across auto-refreshes
+    st.session_state.running = None
+if 'ingestor' not in st.session_state:
+    # SnapshotIngestor running the auto-refresh in the background
+    st.session_state.ingestor = None
+if 'tail_source' not in st.session_state:
+    # (path, FileTailSource) followed by auto-refresh instead of demo data
+    st.session_state.tail_source = None
+if 'windows' not in st.session_state:
+    # (version, WindowedMetrics) per-minute buckets for the sliding KPI windows
+    st.session_state.windows = None
+if 'report_job' not in st.session_state:
+    # Future of the PDF report being built in the background
+    st.session_state.report_job = None
 
-# Required columns for OTT analysis
-REQUIRED_COLUMNS = {
-    'content_id': ['content_id', 'content_title', 'show_name', 'title'],
-    'watch_time': ['watch_time', 'duration', 'watch_duration', 'viewing_time'],
-    'timestamp': ['timestamp', 'watch_timestamp', 'viewing_timestamp', 'date'],
-    'device_type': ['device_type', 'device', 'platform'],
-    'location': ['location', 'city', 'region', 'country'],
-    'is_completed': ['is_completed', 'completed', 'finished']
-}
+def get_tail_source(path):
+    """Tail follower for ``path``, kept for the session so rotation counts survive reruns"""
+    if st.session_state.tail_source is None or st.session_state.tail_source[0] != path:
+        st.session_state.tail_source = (path, FileTailSource(path))
+    return st.session_state.tail_source[1]
 
-def validate_columns(df):
-    """Validate if the dataframe has the required columns"""
-    found_columns = {}
-    missing_columns = []
-    
-    for required_col, alternatives in REQUIRED_COLUMNS.items():
-        found = False
-        for alt in alternatives:
-            if any(col.lower() == alt.lower() for col in df.columns):
-                found = True
-                # Store the actual column name that was found
-                found_columns[required_col] = next(col for col in df.columns if col.lower() == alt.lower())
-                break
-        if not found:
-            missing_columns.append(required_col)
-    
-    return found_columns, missing_columns
+def adopt_snapshot(snapshot, options):
+    """Make a published snapshot the session's dataset, aggregates included"""
+    st.session_state.data = snapshot.data
+    st.session_state.data_version = (id(snapshot.data), snapshot.version)
+    st.session_state.running = ((snapshot.version, options), snapshot.running)
+    st.session_state.windows = (snapshot.version, snapshot.windows)
 
-def analyze_dataset(df):
-    """Analyze the dataset and return a summary"""
-    num_rows = len(df)
-    num_cols = len(df.columns)
-    date_range = None
-    if 'timestamp' in df.columns:
+def live_view(df, running, windows, version):
+    """Newest published snapshot while the background ingestor runs, else this script run's state"""
+    ingestor = st.session_state.ingestor
+    if ingestor is None or not ingestor.running:
+        return df, running, windows, version
+    snapshot = ingestor.front
+    adopt_snapshot(snapshot, ingestor.key[1])
+    return snapshot.data, snapshot.running, snapshot.windows, snapshot.version
+
+def report_panel(dashboard, charts):
+    """Report button; the PDF is built in the background and offered for download once ready"""
+    if st.button("Generate Report"):
+        st.session_state.report_job = submit_report(dashboard, charts)
+    job = st.session_state.report_job
+    polling = job is not None and not job.done()
+
+    # Polls the job without rerunning the page, then reruns the page once so polling stops
+    @st.fragment(run_every=REPORT_POLL_SECONDS if polling else None)
+    def report_status():
+        job = st.session_state.report_job
+        if job is None:
+            return
+        if not job.done():
+            st.caption("⏳ Building report in the background...")
+            return
+        if polling:
+            st.rerun()
         try:
-            df['timestamp'] = pd.to_datetime(df['timestamp'])
-            date_range = f"{df['timestamp'].min().strftime('%Y-%m-%d')} to {df['timestamp'].max().strftime('%Y-%m-%d')}"
-        except:
-            date_range = "Unable to parse date range"
-    
-    return {
-        'num_rows': num_rows,
-        'num_cols': num_cols,
-        'date_range': date_range
-    }
+            pdf_bytes = job.result()
+        except Exception as e:
+            st.error(f"Error generating PDF: {str(e)}")
+            st.info("Please try again or contact support if the issue persists.")
+            return
+        # Create download button
+        st.download_button(
+            label="Download PDF Report",
+            data=pdf_bytes,
+            file_name="ott_analytics_report.pdf",
+            mime="application/pdf"
+        )
+
+    report_status()
+
+def load_events(df):
+    """Make ``df`` the dashboard dataset under a fresh version"""
+    st.session_state.data = df
+    st.session_state.validated = True
+    st.session_state.data_version = (id(df), new_dataset_version())
+
+@st.cache_resource
+def get_dataset_cache():
+    """Process-wide cache of validated datasets, shared by all sessions"""
+    return DatasetCache()
+
+@st.cache_resource
+def get_figure_cache():
+    """Process-wide cache of built Plotly figures keyed by their input aggregates and options"""
+    return FigureCache()
+
+@st.cache_resource
+def get_listener(port):
+    """Process-wide localhost listener for pushed events, started on first use"""
+    return EventListener(port=port).start()
+
+@st.cache_resource
+def get_aggregate_cache():
+    """Process-wide memo of dashboard aggregates keyed by dataset version"""
+    return AggregateCache()
 
 # Sidebar
+refresh_mode = "Live sections"
 with st.sidebar:
     st.header("📊 Dashboard Controls")
     uploaded_file = st.file_uploader("Upload Viewer Data (CSV/Excel)", type=['csv', 'xlsx'])
     
+    # Streaming mode reads large CSV/Excel files chunk by chunk with a typed schema
+    streaming_ingest = st.checkbox("Streaming ingestion (large CSV/Excel files)", value=False)
+    if streaming_ingest:
+        chunk_size = st.number_input("Rows per chunk", min_value=10_000, max_value=5_000_000,
+                                     value=DEFAULT_CHUNK_SIZE, step=50_000)
+    
+    # Large datasets are aggregated map-reduce style across worker processes
+    parallel_workers = st.number_input("Aggregation workers", min_value=1, max_value=default_workers(),
+                                       value=default_workers(), step=1)
+    
+    # HyperLogLog keeps distinct-viewer memory constant at the cost of a small, known error
+    approx_viewers = st.checkbox("Approximate distinct viewers (HyperLogLog)", value=False,
+                                 help="Applies to the all-time count; windowed counts are always estimates")
+    hll_precision = DEFAULT_HLL_PRECISION
+    if approx_viewers:
+        hll_precision = st.slider("Sketch precision", min_value=10, max_value=18, value=DEFAULT_HLL_PRECISION,
+                                  help="Uses 2^precision bytes; higher precision means lower error")
+    
+    # Space-Saving keeps only the most-watched titles for very large catalogs
+    bounded_titles = st.checkbox("Track top titles only (Space-Saving)", value=False)
+    top_k = None
+    if bounded_titles:
+        top_k = int(st.number_input("Titles tracked", min_value=10, max_value=100_000,
+                                    value=DEFAULT_TOP_K_CAPACITY, step=100))
+    
     if uploaded_file is not None:
         try:
-            # Read the file
-            if uploaded_file.name.endswith('.csv'):
-                df = pd.read_csv(uploaded_file)
-            else:
-                df = pd.read_excel(uploaded_file)
+            dataset_cache = get_dataset_cache()
             
-            # Validate columns
-            found_columns, missing_columns = validate_columns(df)
+            # Workbooks with several sheets ask which one holds the events (listed once per upload)
+            sheet_name = None
+            if uploaded_file.name.endswith('.xlsx'):
+                if uploaded_file.file_id not in st.session_state.upload_sheets:
+                    st.session_state.upload_sheets[uploaded_file.file_id] = excel_sheet_names(uploaded_file)
+                sheet_names = st.session_state.upload_sheets[uploaded_file.file_id]
+                if len(sheet_names) > 1:
+                    sheet_name = st.selectbox("Sheet", sheet_names)
             
-            if not missing_columns:
-                # Analyze dataset
-                analysis = analyze_dataset(df)
+            # Hash each upload once per session; reruns reuse the key
+            # (the schema version keeps frames cached by an older build from being served)
+            variant = f"v{SCHEMA_VERSION}:" + ('stream' if streaming_ingest else 'full')
+            if sheet_name is not None:
+                variant += f':{sheet_name}'
+            upload_id = (uploaded_file.file_id, variant)
+            if upload_id not in st.session_state.upload_keys:
+                st.session_state.upload_keys[upload_id] = content_key(uploaded_file.getbuffer(), variant)
+            cache_key = st.session_state.upload_keys[upload_id]
+            
+            # Widget-only reruns reuse the frame already loaded in this session
+            if st.session_state.upload_frame is not None and st.session_state.upload_frame[0] == cache_key:
+                cached = st.session_state.upload_frame[1:]
+            else:
+                cached = dataset_cache.get(cache_key)
+            if cached is not None:
+                # Cached datasets are already validated and normalized
+                df, analysis = cached
+                missing_columns = []
+            else:
+                # Read the file
+                if uploaded_file.name.endswith('.csv'):
+                    if streaming_ingest:
+                        progress = st.progress(0.0, text="Reading file...")
+                        df = read_csv_chunked(
+                            uploaded_file,
+                            chunk_size=int(chunk_size),
+                            on_progress=lambda fraction, rows: progress.progress(fraction, text=f"Read {rows:,} rows")
+                        )
+                        progress.empty()
+                    else:
+                        df = pd.read_csv(uploaded_file)
+                elif streaming_ingest:
+                    progress = st.progress(0.0, text="Reading workbook...")
+                    df = read_excel_streaming(
+                        uploaded_file,
+                        sheet_name=sheet_name,
+                        chunk_size=int(chunk_size),
+                        on_progress=lambda fraction, rows: progress.progress(fraction, text=f"Read {rows:,} rows")
+                    )
+                    progress.empty()
+                else:
+                    df = pd.read_excel(uploaded_file, sheet_name=sheet_name or 0)
+                
+                # Validate columns
+                found_columns, missing_columns = validate_columns(df)
                 
+                if not missing_columns:
+                    # Rename columns to standard names and convert 'is_completed' to boolean
+                    df = normalize_dataset(df, found_columns)
+                    # Dictionary-encoded labels, narrow numerics and bool flags (a no-op for streamed reads)
+                    df = compact_dataset(df)
+                    
+                    # Analyze dataset
+                    analysis = analyze_dataset(df)
+                    dataset_cache.put(cache_key, df, analysis)
+            
+            if not missing_columns:
+                st.session_state.upload_frame = (cache_key, df, analysis)
                 # Show dataset summary
                 st.markdown("""
                 <div class="validation-info">
@@ -386,6 +555,9 @@ with st.sidebar:
                 </div>
                 """.format(analysis['num_rows'], analysis['num_cols'], analysis['date_range']), 
                 unsafe_allow_html=True)
+                if analysis.get('unparsed_timestamps'):
+                    st.warning(f"{analysis['unparsed_timestamps']:,} timestamps could not be parsed; "
+                               f"those rows are left out of the time-based views")
                 
                 # Show sample data
                 st.subheader("📋 Sample Data")
@@ -393,21 +565,8 @@ with st.sidebar:
                 
                 # Confirmation button
                 if st.button("✅ Use This Dataset"):
-                    # Rename columns to standard names
-                    df = df.rename(columns={v: k for k, v in found_columns.items()})
-                    
-                    # Convert 'is_completed' column to boolean
-                    is_completed_col = found_columns.get('is_completed')
-                    if is_completed_col:
-                        # Handle different formats of boolean values
-                        if df[is_completed_col].dtype == 'object':
-                            # Convert string TRUE/FALSE to boolean
-                            df[is_completed_col] = df[is_completed_col].map({
-                                'TRUE': True, 'True': True, 'true': True, '1': True, 1: True,
-                                'FALSE': False, 'False': False, 'false': False, '0': False, 0: False
-                            })
-                    
                     st.session_state.data = df
+                    st.session_state.data_version = (id(df), cache_key)
                     st.session_state.validated = True
                     st.success("Dataset loaded successfully! The dashboard will now update.")
                     
@@ -426,81 +585,127 @@ with st.sidebar:
             st.error(f"Error reading file: {str(e)}")
             st.session_state.validated = False
     
+    dataset_cache = get_dataset_cache()
+    st.caption(f"Dataset cache: {dataset_cache.hits} hits · {dataset_cache.misses} misses")
+    
+    # Live source: auto-refresh appends lines written to this file instead of demo data
+    follow_path = st.text_input("Follow event file (CSV/JSONL)", key='follow_path',
+                                help="Only lines appended since the last refresh are parsed; "
+                                     "the read position survives restarts, rotation and truncation")
+    if follow_path:
+        tail_source = get_tail_source(follow_path)
+        if st.button("Load & Follow"):
+            try:
+                # Resumes from the saved offset; a rotated or truncated file is read again from the top
+                events = tail_source.read_to_end()
+                if len(events):
+                    load_events(events)
+                    st.session_state.auto_refresh = True
+                else:
+                    st.warning("No new complete events in this file since the saved offset")
+            except Exception as e:
+                st.error(f"Error reading file: {str(e)}")
+        st.caption(f"Offset {tail_source.offset:,} bytes · {tail_source.pending_bytes:,} bytes pending · "
+                   f"{tail_source.rotations} rotations · {tail_source.truncations} truncations · "
+                   f"{tail_source.skipped_lines} bad lines skipped")
+        if tail_source.last_skip_error is not None:
+            st.caption(f"Last skipped line: {tail_source.last_skip_error}")
+    
+    # Push source: batches POSTed to a localhost endpoint are drained on each refresh
+    listener = None
+    if st.checkbox("Accept pushed events (localhost HTTP)", key='listen'):
+        listen_port = st.number_input("Listener port", min_value=1024, max_value=65535,
+                                      value=DEFAULT_LISTEN_PORT, step=1)
+        try:
+            listener = get_listener(int(listen_port))
+        except OSError as e:
+            st.error(f"Could not listen on port {listen_port}: {str(e)}")
+        if listener is not None:
+            stats = listener.stats()
+            st.caption(f"POST to http://{listener.host}:{listener.port}/events · "
+                       f"{stats['rows_per_second']:,.0f} rows/s · queue {stats['queue_depth']}/"
+                       f"{stats['queue_capacity']} batches · {stats['batches_rejected']} rejected")
+            if not st.session_state.validated:
+                events = listener.drain()
+                if len(events):
+                    load_events(events)
+                    st.session_state.auto_refresh = True
+    
     if st.session_state.validated:
         st.session_state.auto_refresh = st.toggle("Enable Auto-Refresh", st.session_state.auto_refresh)
+        if st.session_state.auto_refresh:
+            refresh_mode = st.radio("Refresh", ["Live sections", "Full page"], horizontal=True, key='refresh_mode',
+                                    help="Live sections re-renders only the KPIs and trending cards on each tick; "
+                                         "Full page reruns the whole dashboard when new data arrives")
         
-        if st.button("Generate Report"):
-            if st.session_state.data is not None:
-                # Create PDF report using a different approach to avoid BytesIO error
-                try:
-                    # Create PDF report
-                    pdf = FPDF()
-                    pdf.add_page()
-                    pdf.set_font('Arial', 'B', 16)
-                    pdf.cell(0, 10, 'OTT Analytics Dashboard Report', ln=True, align='C')
-                    pdf.set_font('Arial', '', 12)
-                    
-                    # Add timestamp
-                    pdf.cell(0, 10, f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', ln=True)
-                    
-                    # Add summary statistics
-                    pdf.ln(10)
-                    pdf.set_font('Arial', 'B', 14)
-                    pdf.cell(0, 10, 'Key Metrics', ln=True)
-                    pdf.set_font('Arial', '', 12)
-                    
-                    # Calculate metrics for the PDF
-                    total = len(df['user_id'].unique()) if 'user_id' in df.columns else len(df)
-                    avg_time = df['watch_time'].mean()
-                    completion = (df['is_completed'].astype(int).sum() / len(df)) * 100
-                    
-                    pdf.cell(0, 10, f'Total Viewers: {total}', ln=True)
-                    pdf.cell(0, 10, f'Average Watch Time: {avg_time:.1f} minutes', ln=True)
-                    pdf.cell(0, 10, f'Completion Rate: {completion:.1f}%', ln=True)
-                    
-                    # Add information about top content
-                    top_content = df['content_id'].value_counts().nlargest(3)
-                    pdf.ln(10)
-                    pdf.set_font('Arial', 'B', 14)
-                    pdf.cell(0, 10, 'Top Content', ln=True)
-                    pdf.set_font('Arial', '', 12)
-                    
-                    for content, count in top_content.items():
-                        pdf.cell(0, 10, f'{content}: {count} viewers', ln=True)
-                    
-                    # Save to bytes for download
-                    pdf_bytes = pdf.output(dest='S').encode('latin-1')
-                    
-                    # Create download button
-                    st.download_button(
-                        label="Download PDF Report",
-                        data=pdf_bytes,
-                        file_name="ott_analytics_report.pdf",
-                        mime="application/pdf"
-                    )
-                except Exception as e:
-                    st.error(f"Error generating PDF: {str(e)}")
-                    st.info("Please try again or contact support if the issue persists.")
 
 # Main content
 if st.session_state.validated and st.session_state.data is not None:
     df = st.session_state.data
     
-    # Auto-refresh logic
+    # Frames put in session state without a version (the loaders compact on read) are compacted once,
+    # which also makes is_completed boolean for calculations
+    if st.session_state.data_version is None or st.session_state.data_version[0] != id(df):
+        df = st.session_state.data = compact_dataset(as_frame(df))
+    
+    # Auto-refresh: a background thread ingests new events and aggregates them into a back buffer;
+    # every rerun renders the latest published snapshot and never waits on ingestion
+    running_options = {'approx_viewers': approx_viewers, 'precision': hll_precision, 'top_k': top_k}
+    options_key = tuple(sorted(running_options.items()))
+    source_key = ('file', follow_path) if follow_path else ('listener', id(listener)) if listener is not None else ('demo',)
+    ingestor = st.session_state.ingestor
+    if ingestor is not None:
+        owned = st.session_state.data_version is not None and st.session_state.data_version[1] in ingestor.versions
+        retire = (not owned or not ingestor.running or not st.session_state.auto_refresh
+                  or ingestor.key != (source_key, options_key))
+        if retire:
+            # Stopped first, so the adopted snapshot is its last one and matches the ids a successor takes over
+            ingestor.stop()
+        if owned:
+            # Everything ingested so far is kept, even when the source or options change below
+            adopt_snapshot(ingestor.front, ingestor.key[1])
+        if retire:
+            ingestor = st.session_state.ingestor = None
+    df = st.session_state.data
+    
+    # Aggregates are computed once per dataset version and reused by widget-only reruns
+    # (data set without a version token gets a content fingerprint once)
+    if st.session_state.data_version is None or st.session_state.data_version[0] != id(df):
+        st.session_state.data_version = (id(df), dataset_fingerprint(as_frame(df)))
+    data_version = st.session_state.data_version[1]
+    aggregates = get_aggregate_cache()
+    figures = get_figure_cache()
+    figure_stats = FigureStats()
+    
+    # Running totals are built once per loaded dataset and then maintained incrementally
+    running_key = (data_version, options_key)
+    if st.session_state.running is None or st.session_state.running[0] != running_key:
+        st.session_state.running = (running_key, parallel_aggregate(as_frame(df), int(parallel_workers), **running_options))
+    running = st.session_state.running[1]
+    if st.session_state.windows is None or st.session_state.windows[0] != data_version:
+        st.session_state.windows = (data_version, WindowedMetrics.from_frame(as_frame(df)))
+    windows = st.session_state.windows[1]
+    
     if st.session_state.auto_refresh:
-        if (datetime.now() - st.session_state.last_refresh).seconds >= 10:
-            st.session_state.data = get_mock_data()
-            st.session_state.last_refresh = datetime.now()
-            st.rerun()
+        if ingestor is None:
+            if follow_path:
+                fetch = get_tail_source(follow_path).read
+            elif listener is not None:
+                fetch = listener.drain
+            else:
+                fetch = get_mock_data
+            ingestor = SnapshotIngestor(Snapshot(df, running, windows, data_version, time.time()), fetch,
+                                        interval=DEFAULT_REFRESH_SECONDS, key=(source_key, options_key))
+            st.session_state.ingestor = ingestor
     
-    # Ensure is_completed is boolean for calculations
-    if 'is_completed' in df.columns and df['is_completed'].dtype != 'bool':
-        df['is_completed'] = df['is_completed'].astype(bool)
+    # Timer-driven refresh: the KPI and trending fragments re-run on their own, without a full-script rerun
+    refresh_every = DEFAULT_REFRESH_SECONDS if st.session_state.auto_refresh else None
     
-    # Calculate metrics
-    total_viewers = len(df['user_id'].unique()) if 'user_id' in df.columns else len(df)
-    avg_watch_time = df['watch_time'].mean()
-    completion_rate = (df['is_completed'].astype(int).sum() / len(df)) * 100
+    # Compute every section headlessly; the rest of the page only renders the results
+    # The drop-off resolution widget is rendered further down; its keyed value is already in session state
+    dropoff_buckets = DROPOFF_RESOLUTIONS[st.session_state.get('dropoff_resolution', 'Deciles')]
+    # KPIs and trending are recomputed from the live snapshot inside their fragments below
+    dashboard = build_dashboard(df, running, aggregates, data_version, dropoff_buckets=dropoff_buckets)
     
     # Display KPI metrics
     st.markdown("""
@@ -509,14 +714,56 @@ if st.session_state.validated and st.session_state.data is not None:
     </div>
     """, unsafe_allow_html=True)
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric("Total Active Viewers", f"{total_viewers:,}")
-    with col2:
-        st.metric("Average Watch Time", f"{avg_watch_time:.1f} min")
-    with col3:
-        st.metric("Content Completion Rate", f"{completion_rate:.1f}%")
+    @st.fragment(run_every=refresh_every)
+    def render_kpis():
+        live_df, live_running, live_windows, live_version = live_view(df, running, windows, data_version)
+        if refresh_mode == "Full page" and live_version != data_version:
+            st.rerun()
+        ingestor = st.session_state.ingestor
+        if ingestor is not None:
+            # Staleness: age of the snapshot on screen and of the last poll of the source
+            poll_age = time.time() - ingestor.last_poll
+            st.caption(f"🕒 Showing data published {ingestor.front.age:.0f}s ago ({len(live_df):,} rows) · "
+                       f"source last polled {poll_age:.0f}s ago")
+            if ingestor.last_error is not None:
+                st.warning(f"Could not read new events: {str(ingestor.last_error)}")
+        
+        kpi_window = KPI_WINDOWS[st.radio("Window", list(KPI_WINDOWS), horizontal=True, key='kpi_window')]
+        kpis, deltas = kpi_section(live_running), None
+        if kpi_window is not None:
+            # Last N minutes up to the newest event, compared with the N minutes before
+            windowed = window_section(live_windows, kpi_window)
+            if windowed is not None:
+                kpis, deltas = windowed.current, windowed.deltas
+            else:
+                st.caption("No parseable timestamps, so the KPIs cover all time")
+        total_viewers = kpis.total_viewers
+        avg_watch_time = kpis.avg_watch_time
+        completion_rate = kpis.completion_rate
+    
+        col1, col2, col3 = st.columns(3)
+    
+        with col1:
+            viewers_delta = f"{deltas.total_viewers:+,}" if deltas else None
+            if kpis.viewers_error:
+                st.metric("Total Active Viewers", f"~{total_viewers:,}", viewers_delta)
+                if deltas:
+                    st.caption(f"Windowed counts are always HyperLogLog estimates, "
+                               f"±{kpis.viewers_error:.2%} standard error")
+                else:
+                    st.caption(f"HyperLogLog estimate, ±{kpis.viewers_error:.2%} standard error")
+            else:
+                st.metric("Total Active Viewers", f"{total_viewers:,}", viewers_delta)
+        with col2:
+            watch_time_delta = f"{deltas.avg_watch_time:+.1f} min" if deltas and not np.isnan(deltas.avg_watch_time) else None
+            st.metric("Average Watch Time", f"{avg_watch_time:.1f} min", watch_time_delta)
+        with col3:
+            completion_delta = f"{deltas.completion_rate:+.1f} pts" if deltas else None
+            st.metric("Content Completion Rate", f"{completion_rate:.1f}%", completion_delta)
+        if deltas:
+            st.caption(f"Compared with the previous {kpi_window} minutes")
+    
+    render_kpis()
     
     # Create visualizations
     st.markdown("""
@@ -529,49 +776,12 @@ if st.session_state.validated and st.session_state.data is not None:
     
     with col1:
         # Active viewers by content (3D Donut Chart)
-        content_viewers = df['content_id'].value_counts()
-        fig_content = go.Figure(data=[go.Pie(
-            labels=content_viewers.index,
-            values=content_viewers.values,
-            hole=0.5,
-            textinfo='label+percent',
-            marker=dict(
-                colors=px.colors.sequential.Plasma,
-                line=dict(color='rgba(255, 255, 255, 0.5)', width=1)
-            )
-        )])
-        fig_content.update_layout(
-            title="Active Viewers by Content",
-            showlegend=False,
-            height=400,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="white"),
-            margin=dict(l=20, r=20, t=40, b=20),
-        )
+        fig_content = figures.get('content', content_pie, dashboard.content.counts, stats=figure_stats)
         st.plotly_chart(fig_content, use_container_width=True)
         
     with col2:
         # Device usage breakdown (3D Pie Chart)
-        device_usage = df['device_type'].value_counts()
-        fig_devices = go.Figure(data=[go.Pie(
-            labels=device_usage.index,
-            values=device_usage.values,
-            textinfo='label+percent',
-            marker=dict(
-                colors=px.colors.sequential.Viridis,
-                line=dict(color='rgba(255, 255, 255, 0.5)', width=1)
-            )
-        )])
-        fig_devices.update_layout(
-            title="Device Usage Breakdown",
-            showlegend=False,
-            height=400,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="white"),
-            margin=dict(l=20, r=20, t=40, b=20),
-        )
+        fig_devices = figures.get('devices', device_pie, dashboard.devices.counts, stats=figure_stats)
         st.plotly_chart(fig_devices, use_container_width=True)
     
     # Viewer drop-off analysis
@@ -582,103 +792,16 @@ if st.session_state.validated and st.session_state.data is not None:
     </div>
     """, unsafe_allow_html=True)
     
-    df['minute_bucket'] = pd.qcut(df['watch_time'], q=10, labels=False)
-    dropoff_data = df.groupby('minute_bucket').size()
-    
-    fig_dropoff = go.Figure()
-    fig_dropoff.add_trace(go.Scatter(
-        x=list(range(len(dropoff_data))),
-        y=dropoff_data.values,
-        mode='lines+markers',
-        name='Viewers',
-        line=dict(width=3, color='#4A00E0'),
-        marker=dict(
-            size=8,
-            color=dropoff_data.values,
-            colorscale='Viridis',
-            line=dict(width=1, color='rgba(255, 255, 255, 0.5)')
-        ),
-        fill='tozeroy',
-        fillcolor='rgba(74, 0, 224, 0.2)'
-    ))
-    fig_dropoff.update_layout(
-        title=None,
-        xaxis_title="Watch Time Percentile",
-        yaxis_title="Number of Viewers",
-        height=400,
-        paper_bgcolor="rgba(0,0,0,0)",
-        plot_bgcolor="rgba(0,0,0,0)",
-        font=dict(color="white"),
-        margin=dict(l=20, r=20, t=10, b=20),
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255, 255, 255, 0.1)',
-            showline=True,
-            linecolor='rgba(255, 255, 255, 0.2)',
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(255, 255, 255, 0.1)',
-            showline=True,
-            linecolor='rgba(255, 255, 255, 0.2)',
-        )
-    )
+    st.radio("Resolution", options=list(DROPOFF_RESOLUTIONS), horizontal=True, key='dropoff_resolution')
+    
+    fig_dropoff = figures.get('dropoff', dropoff_chart, dashboard.dropoff.counts, dashboard.dropoff.edges,
+                              dashboard.dropoff.buckets, stats=figure_stats)
     st.plotly_chart(fig_dropoff, use_container_width=True)
     
     # Location-wise viewership
     st.subheader("🌎 Geographical Viewership")
-    location_data = df['location'].value_counts().reset_index()
-    location_data.columns = ['location', 'viewers']
-    
-    # Add geo-mapping utilities
-    def detect_location_type(locations):
-        """Determine if locations are likely US states, cities, or countries"""
-        us_states = ["Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut", 
-                   "Delaware", "Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa", 
-                   "Kansas", "Kentucky", "Louisiana", "Maine", "Maryland", "Massachusetts", "Michigan", 
-                   "Minnesota", "Mississippi", "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire", 
-                   "New Jersey", "New Mexico", "New York", "North Carolina", "North Dakota", "Ohio", "Oklahoma", 
-                   "Oregon", "Pennsylvania", "Rhode Island", "South Carolina", "South Dakota", "Tennessee", 
-                   "Texas", "Utah", "Vermont", "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming",
-                   "District of Columbia"]
-        
-        major_countries = ["United States", "Canada", "Mexico", "Brazil", "Argentina", "United Kingdom", 
-                          "France", "Germany", "Italy", "Spain", "Russia", "China", "Japan", "India", 
-                          "Australia", "New Zealand", "South Africa", "Nigeria", "Egypt", "Saudi Arabia"]
-        
-        # Check for state abbreviations like "NY", "CA"
-        us_state_abbrevs = ["AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "ID", "IL", 
-                           "IN", "IA", "KS", "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT", 
-                           "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI", 
-                           "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY", "DC"]
-        
-        # Major cities to check for
-        major_cities = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio", 
-                       "San Diego", "Dallas", "San Jose", "London", "Paris", "Tokyo", "Mumbai", "Sydney", 
-                       "Singapore", "Hong Kong", "Dubai", "Toronto", "Mexico City"]
-        
-        # Check for match patterns
-        us_state_matches = sum(1 for loc in locations if loc in us_states or loc in us_state_abbrevs)
-        country_matches = sum(1 for loc in locations if loc in major_countries)
-        city_matches = sum(1 for loc in locations if loc in major_cities or 
-                          any(city in loc for city in major_cities))
-        
-        # Calculate percentages
-        total = len(locations)
-        us_state_pct = us_state_matches / total if total > 0 else 0
-        country_pct = country_matches / total if total > 0 else 0
-        city_pct = city_matches / total if total > 0 else 0
-        
-        # Determine type based on highest percentage
-        if us_state_pct > 0.3:
-            return "usa-states"
-        elif country_pct > 0.3:
-            return "country"
-        else:
-            return "city"
-    
-    # Detect map type based on data
-    location_type = detect_location_type(location_data['location'])
+    location_data = dashboard.geography.locations
+    location_type = dashboard.geography.location_type
     
     # Create map scope selection
     map_options = {
@@ -715,6 +838,7 @@ if st.session_state.validated and st.session_state.data is not None:
         enable_animation = st.checkbox("Enable Animation", value=False)
         
         if enable_animation:
+            animation_resolution = st.radio("Frame per", options=list(MAP_FRAME_RESOLUTIONS), horizontal=True)
             animation_speed = st.slider("Animation Speed", 
                                        min_value=500, 
                                        max_value=2000, 
@@ -735,132 +859,30 @@ if st.session_state.validated and st.session_state.data is not None:
         </div>
         """, unsafe_allow_html=True)
         
-        # Determine appropriate settings based on location type and scope
-        if location_type == "usa-states" and scope == "usa":
-            projection = "albers usa"
-            locationmode = "USA-states"
-        elif scope == "world" or scope in ["europe", "asia", "north america"]:
-            projection = "natural earth"
-            locationmode = "country names" if location_type == "country" else "ISO-3"
-        else:
-            projection = "mercator"
-            locationmode = "country names" if location_type == "country" else "ISO-3"
-        
-        # Create the appropriate map based on user selection
-        if map_viz_type == "Bubble Map":
-            # For bubble map (scatter geo)
-            fig_map = px.scatter_geo(
-                location_data,
-                locationmode=locationmode,
-                locations='location',
-                size='viewers',
-                color='viewers',
-                color_continuous_scale=px.colors.sequential.Plasma,
-                scope=scope,
-                projection=projection,
-                title='Global Viewership Distribution',
-                hover_name='location',
-                hover_data={
-                    'location': False,
-                    'viewers': True,
-                },
-                size_max=50,
-                animation_frame='location' if enable_animation else None,
-                animation_group='location' if enable_animation else None,
-            )
-            
-            if enable_animation:
-                fig_map.layout.updatemenus[0].buttons[0].args[1]['frame']['duration'] = animation_speed
-        
-        else:
-            # For choropleth map
-            if scope == "usa":
-                # US State level choropleth
-                fig_map = px.choropleth(
-                    location_data,
-                    locationmode=locationmode,
-                    locations='location',
-                    color='viewers',
-                    scope=scope,
-                    color_continuous_scale=px.colors.sequential.Plasma,
-                    title='Viewership Density by Region',
-                    hover_name='location',
-                    hover_data={
-                        'location': False,
-                        'viewers': True,
-                    },
-                )
-            else:
-                # Country level choropleth
-                fig_map = px.choropleth(
-                    location_data,
-                    locationmode=locationmode,
-                    locations='location',
-                    color='viewers',
-                    scope=scope,
-                    color_continuous_scale=px.colors.sequential.Plasma,
-                    projection=projection,
-                    title='Global Viewership Density',
-                    hover_name='location',
-                    hover_data={
-                        'location': False,
-                        'viewers': True,
-                    },
-                )
-        
-        # Enhance map styling
-        fig_map.update_geos(
-            showcoastlines=True, coastlinecolor="white",
-            showland=True, landcolor="rgb(17, 17, 17)",
-            showocean=True, oceancolor="rgb(10, 10, 30)",
-            showlakes=True, lakecolor="rgb(17, 17, 17)",
-            showrivers=True, rivercolor="rgb(17, 17, 17)",
-            showcountries=True, countrycolor="white",
-            showsubunits=True, subunitcolor="white",
-            resolution=110,
-            bgcolor="rgba(0,0,0,0)"
-        )
-        
-        # Improve layout
-        fig_map.update_layout(
-            height=600,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            margin=dict(l=0, r=0, t=30, b=0),
-            coloraxis_colorbar=dict(
-                title="Viewers",
-                thicknessmode="pixels", thickness=20,
-                lenmode="pixels", len=400,
-                yanchor="top", y=1,
-                ticks="outside"
-            ),
-            geo=dict(
-                bgcolor="rgba(0,0,0,0)",
-            )
-        )
-        
-        # Add city labels for top cities if using bubble map
-        if map_viz_type == "Bubble Map":
-            top_locations = location_data.nlargest(5, 'viewers')
-            for idx, row in top_locations.iterrows():
-                fig_map.add_annotation(
-                    x=row['location'],
-                    text=f"{row['location']}: {row['viewers']}",
-                    showarrow=True,
-                    arrowhead=2,
-                    arrowsize=1,
-                    arrowwidth=2,
-                    arrowcolor="white",
-                    font=dict(size=14, color="white"),
-                    bordercolor="white",
-                    borderwidth=2,
-                    borderpad=4,
-                    bgcolor="rgba(50, 50, 50, 0.7)",
-                    opacity=0.8
-                )
+        map_frames = None
+        if enable_animation and map_viz_type == "Bubble Map":
+            map_frames = memoized(aggregates, data_version, 'map_frames', map_frames_section, as_frame(df),
+                                  location_type=location_type,
+                                  resolution=MAP_FRAME_RESOLUTIONS[animation_resolution])
+        animated = map_frames is not None and len(map_frames.frames) > 0
+        # The frame set is cached apart from the play speed, so moving the speed slider only restyles a copy
+        fig_map = figures.get('map', location_map, location_data, location_type,
+                              map_frames.frames if animated else None, stats=figure_stats,
+                              scope=scope, map_viz_type=map_viz_type)
+        if animated:
+            fig_map = with_animation_speed(fig_map, animation_speed)
         
         # Add an interactive element
         st.plotly_chart(fig_map, use_container_width=True)
+
+        unresolved = dashboard.geography.unresolved
+        if unresolved:
+            shown = ", ".join(unresolved[:10]) + (f" and {len(unresolved) - 10:,} more" if len(unresolved) > 10 else "")
+            st.caption(f"{len(unresolved):,} of {len(location_data):,} locations are not in the geocoding table "
+                       f"and are left off the map: {shown}")
+        if animated and map_frames.buckets_per_frame > 1:
+            st.caption(f"Animation capped at {MAX_MAP_FRAMES} frames: each frame covers "
+                       f"{map_frames.buckets_per_frame} {map_frames.resolution}s")
     
     # Summary metrics below the map
     st.markdown("### Viewer Distribution Analysis")
@@ -885,141 +907,44 @@ if st.session_state.validated and st.session_state.data is not None:
             """, unsafe_allow_html=True)
     
     with col2:
-        # Define regional mapping based on detected location type
-        if location_type == "usa-states":
-            # Regional mapping for US states
-            region_mapping = {
-                "New York": "Northeast", "Massachusetts": "Northeast", "Rhode Island": "Northeast", 
-                "Connecticut": "Northeast", "Vermont": "Northeast", "New Hampshire": "Northeast", 
-                "Maine": "Northeast", "Pennsylvania": "Northeast", "New Jersey": "Northeast",
-                "California": "West", "Washington": "West", "Oregon": "West", "Nevada": "West", 
-                "Idaho": "West", "Montana": "West", "Wyoming": "West", "Utah": "West", 
-                "Colorado": "West", "Alaska": "West", "Hawaii": "West", "Arizona": "Southwest", 
-                "New Mexico": "Southwest", "Texas": "Southwest", "Oklahoma": "Southwest",
-                "Illinois": "Midwest", "Ohio": "Midwest", "Michigan": "Midwest", "Indiana": "Midwest", 
-                "Wisconsin": "Midwest", "Minnesota": "Midwest", "Iowa": "Midwest", 
-                "Missouri": "Midwest", "North Dakota": "Midwest", "South Dakota": "Midwest", 
-                "Nebraska": "Midwest", "Kansas": "Midwest",
-                "Florida": "Southeast", "Georgia": "Southeast", "North Carolina": "Southeast", 
-                "South Carolina": "Southeast", "Virginia": "Southeast", "West Virginia": "Southeast", 
-                "Kentucky": "Southeast", "Tennessee": "Southeast", "Alabama": "Southeast", 
-                "Mississippi": "Southeast", "Arkansas": "Southeast", "Louisiana": "Southeast", 
-                "Delaware": "Southeast", "Maryland": "Southeast", "District of Columbia": "Southeast",
-                "NY": "Northeast", "MA": "Northeast", "RI": "Northeast", "CT": "Northeast", 
-                "VT": "Northeast", "NH": "Northeast", "ME": "Northeast", "PA": "Northeast", 
-                "NJ": "Northeast", "CA": "West", "WA": "West", "OR": "West", "NV": "West", 
-                "ID": "West", "MT": "West", "WY": "West", "UT": "West", "CO": "West", 
-                "AK": "West", "HI": "West", "AZ": "Southwest", "NM": "Southwest", 
-                "TX": "Southwest", "OK": "Southwest", "IL": "Midwest", "OH": "Midwest", 
-                "MI": "Midwest", "IN": "Midwest", "WI": "Midwest", "MN": "Midwest", 
-                "IA": "Midwest", "MO": "Midwest", "ND": "Midwest", "SD": "Midwest", 
-                "NE": "Midwest", "KS": "Midwest", "FL": "Southeast", "GA": "Southeast", 
-                "NC": "Southeast", "SC": "Southeast", "VA": "Southeast", "WV": "Southeast", 
-                "KY": "Southeast", "TN": "Southeast", "AL": "Southeast", "MS": "Southeast", 
-                "AR": "Southeast", "LA": "Southeast", "DE": "Southeast", "MD": "Southeast", 
-                "DC": "Southeast"
-            }
-            region_title = "US Regional Distribution"
-        
-        elif location_type == "country":
-            # Regional mapping for countries
-            region_mapping = {
-                "United States": "North America", "Canada": "North America", "Mexico": "North America",
-                "Brazil": "South America", "Argentina": "South America", "Chile": "South America", 
-                "Colombia": "South America", "Peru": "South America", "Venezuela": "South America",
-                "United Kingdom": "Europe", "France": "Europe", "Germany": "Europe", "Italy": "Europe", 
-                "Spain": "Europe", "Portugal": "Europe", "Netherlands": "Europe", "Belgium": "Europe", 
-                "Switzerland": "Europe", "Austria": "Europe", "Sweden": "Europe", "Norway": "Europe", 
-                "Denmark": "Europe", "Finland": "Europe", "Greece": "Europe", "Ireland": "Europe",
-                "Russia": "Europe", "Ukraine": "Europe", "Poland": "Europe", "Romania": "Europe",
-                "China": "Asia", "Japan": "Asia", "South Korea": "Asia", "North Korea": "Asia", 
-                "India": "Asia", "Pakistan": "Asia", "Bangladesh": "Asia", "Indonesia": "Asia", 
-                "Thailand": "Asia", "Vietnam": "Asia", "Malaysia": "Asia", "Singapore": "Asia", 
-                "Philippines": "Asia", "Taiwan": "Asia", "Hong Kong": "Asia",
-                "Australia": "Oceania", "New Zealand": "Oceania", 
-                "Egypt": "Africa", "South Africa": "Africa", "Nigeria": "Africa", "Kenya": "Africa", 
-                "Morocco": "Africa", "Algeria": "Africa", "Tunisia": "Africa", "Ghana": "Africa",
-                "Saudi Arabia": "Middle East", "UAE": "Middle East", "Qatar": "Middle East", 
-                "Israel": "Middle East", "Turkey": "Middle East", "Iran": "Middle East"
-            }
-            region_title = "Continental Distribution"
-        
-        else:
-            # Default city-to-region mapping
-            region_mapping = {
-                'New York': 'East Coast',
-                'Boston': 'East Coast',
-                'Philadelphia': 'East Coast',
-                'Los Angeles': 'West Coast',
-                'San Francisco': 'West Coast',
-                'Seattle': 'West Coast',
-                'Portland': 'West Coast',
-                'Chicago': 'Midwest',
-                'Detroit': 'Midwest',
-                'Minneapolis': 'Midwest',
-                'Houston': 'South',
-                'Dallas': 'South',
-                'Miami': 'South',
-                'Atlanta': 'South',
-                'Phoenix': 'Southwest',
-                'Denver': 'Southwest',
-                'Las Vegas': 'Southwest',
-                'London': 'Europe',
-                'Paris': 'Europe',
-                'Berlin': 'Europe',
-                'Rome': 'Europe',
-                'Madrid': 'Europe',
-                'Tokyo': 'Asia',
-                'Seoul': 'Asia',
-                'Beijing': 'Asia',
-                'Shanghai': 'Asia',
-                'Mumbai': 'Asia',
-                'Sydney': 'Australia',
-                'Melbourne': 'Australia',
-                'Auckland': 'Australia',
-                'Toronto': 'Canada',
-                'Vancouver': 'Canada',
-                'Montreal': 'Canada',
-                'Mexico City': 'Latin America',
-                'São Paulo': 'Latin America',
-                'Buenos Aires': 'Latin America'
-            }
-            region_title = "Regional Distribution"
+        region_title = dashboard.regions.title
+        region_data = dashboard.regions.regions
         
         # Create region comparison visualization
         st.markdown(f"### 🗺️ {region_title}")
         
-        # Map locations to regions and handle unmapped locations
-        location_data['region'] = location_data['location'].map(
-            lambda x: region_mapping.get(x, 'Other')
-        )
-        
-        # Aggregate by region
-        region_data = location_data.groupby('region')['viewers'].sum().reset_index()
-        
         # Create a simple horizontal bar chart for regions
-        fig_regions = px.bar(
-            region_data.sort_values('viewers', ascending=True),
-            y='region',
-            x='viewers',
-            orientation='h',
-            color='viewers',
-            color_continuous_scale=px.colors.sequential.Viridis,
-            title=region_title
-        )
-        
-        fig_regions.update_layout(
-            height=300,
-            xaxis_title="Number of Viewers",
-            yaxis_title=None,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font=dict(color="white"),
-            margin=dict(l=0, r=0, t=30, b=0),
-        )
+        fig_regions = figures.get('regions', region_bar, region_data, region_title, stats=figure_stats)
         
         st.plotly_chart(fig_regions, use_container_width=True)
     
+    # Figures are rebuilt only when their aggregates or styling change (Streamlit still serializes each one)
+    st.caption(f"Charts from cache: {figure_stats.hits}/{figure_stats.hits + figure_stats.misses} "
+               f"({figure_stats.hit_rate:.0%}) · {figure_stats.seconds_saved * 1000:.0f} ms of figure construction "
+               f"saved this run · {figures.hit_rate:.0%} hit rate since start")
+    
+    # The report reuses the sections and charts above (a still map when the map is animated)
+    report_charts = {
+        "Active Viewers by Content": fig_content,
+        "Device Usage": fig_devices,
+        "Viewer Drop-off": fig_dropoff,
+        "Geographical Viewership": figures.get('map', location_map, location_data, location_type, None,
+                                               scope=scope, map_viz_type=map_viz_type) if animated else fig_map,
+        region_title: fig_regions,
+    }
+    with st.sidebar:
+        report_panel(dashboard, report_charts)
+        
+        # Bytes per column as loaded against pandas' default object/64-bit layout; measured only on request
+        # because it needs the appended event batches combined into one frame
+        if st.toggle("🧮 Memory Footprint", key='show_memory_footprint'):
+            footprint = memoized(aggregates, data_version, 'memory_footprint', memory_footprint, as_frame(df))
+            total = footprint.loc['total']
+            st.caption(f"{total['compact_bytes'] / 1024 ** 2:,.1f} MB in memory · "
+                       f"{total['plain_bytes'] / 1024 ** 2:,.1f} MB as plain pandas · {total['saved']:.0%} saved")
+            st.dataframe(footprint.style.format({'plain_bytes': '{:,}', 'compact_bytes': '{:,}', 'saved': '{:.0%}'}),
+                         use_container_width=True)
+    
     # Trending Shows
     st.markdown("""
     <div style="margin: 30px 0 20px 0;">
@@ -1027,68 +952,70 @@ if st.session_state.validated and st.session_state.data is not None:
     </div>
     """, unsafe_allow_html=True)
     
-    # Create a safer aggregation that doesn't rely on user_id
-    agg_dict = {
-        'watch_time': 'mean',
-        'is_completed': lambda x: x.astype(int).mean()
-    }
-    
-    # Add a count metric (using a column we know exists)
-    count_col = 'content_id'  # This column definitely exists since we're grouping by it
-    
-    trending_shows = df.groupby('content_id').agg(agg_dict)
-    # Add count separately
-    trending_shows['count'] = df.groupby('content_id').size()
-    
-    # Sort and get top 5
-    trending_shows = trending_shows.sort_values('watch_time', ascending=False).head(5)
-    
-    # Create a row of trending cards
-    trend_cols = st.columns(5)
-    
-    # Choose colors for each card
-    card_colors = [
-        "linear-gradient(135deg, #8E2DE2 0%, #4A00E0 100%)",
-        "linear-gradient(135deg, #43CBFF 0%, #9708CC 100%)",
-        "linear-gradient(135deg, #FDD819 0%, #E80505 100%)",
-        "linear-gradient(135deg, #00C9FF 0%, #92FE9D 100%)",
-        "linear-gradient(135deg, #FC466B 0%, #3F5EFB 100%)"
-    ]
-    
-    # Icons for metrics
-    icons = {
-        "viewers": "👁️",
-        "watch_time": "⏱️",
-        "completion": "✅"
-    }
-    
-    for idx, (show, col) in enumerate(zip(trending_shows.index, trend_cols)):
-        with col:
-            st.markdown(f"""
-            <div style="background: {card_colors[idx % len(card_colors)]}; border-radius: 12px; padding: 1rem; height: 220px; display: flex; flex-direction: column; justify-content: space-between; box-shadow: 0 4px 20px rgba(0, 0, 0, 0.3);">
-                <div>
-                    <h3 style="font-size: 1.2rem; margin-bottom: 10px; color: white; font-weight: 600; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;">{show}</h3>
-                    <div style="width: 100%; height: 3px; background: rgba(255,255,255,0.3); margin: 8px 0;"></div>
-                </div>
-                <div>
-                    <div style="margin: 7px 0;">
-                        <span style="font-size: 0.8rem; opacity: 0.9;">{icons["viewers"]} Viewers</span>
-                        <div style="font-size: 1.2rem; font-weight: 600;">{trending_shows.loc[show, 'count']:,.0f}</div>
-                    </div>
-                    <div style="margin: 7px 0;">
-                        <span style="font-size: 0.8rem; opacity: 0.9;">{icons["watch_time"]} Avg. Watch</span>
-                        <div style="font-size: 1.2rem; font-weight: 600;">{trending_shows.loc[show, 'watch_time']:.1f} min</div>
+    @st.fragment(run_every=refresh_every)
+    def render_trending():
+        live_df, live_running, live_windows, live_version = live_view(df, running, windows, data_version)
+        trending_by = TRENDING_MODES[st.radio("Rank by", list(TRENDING_MODES), horizontal=True, key='trending_mode')]
+        # Trend velocity compares the selected KPI window (15 minutes for all time) with the ones before it
+        velocity_minutes = KPI_WINDOWS[st.session_state.get('kpi_window', "All time")] or DEFAULT_VELOCITY_MINUTES
+        trending = select_trending(live_running, live_windows, aggregates, live_version, trending_by, velocity_minutes)
+        trending_shows = trending.shows
+        if trending_by == 'velocity':
+            st.caption(f"Last {velocity_minutes} minutes against the two windows before: "
+                       f"growth and acceleration in views, weighted by completion")
+        elif top_k:
+            st.caption(f"Ranked among the {trending.tracked:,} most-watched titles; "
+                       f"view counts may be overestimated by up to {trending.count_error:,}")
+    
+        # Create a row of trending cards
+        trend_cols = st.columns(5)
+    
+        # Choose colors for each card
+        card_colors = [
+            "linear-gradient(135deg, #8E2DE2 0%, #4A00E0 100%)",
+            "linear-gradient(135deg, #43CBFF 0%, #9708CC 100%)",
+            "linear-gradient(135deg, #FDD819 0%, #E80505 100%)",
+            "linear-gradient(135deg, #00C9FF 0%, #92FE9D 100%)",
+            "linear-gradient(135deg, #FC466B 0%, #3F5EFB 100%)"
+        ]
+    
+        # Icons for metrics
+        icons = {
+            "viewers": "👁️",
+            "watch_time": "⏱️",
+            "completion": "✅"
+        }
+    
+        for idx, (show, col) in enumerate(zip(trending_shows.index, trend_cols)):
+            with col:
+                st.markdown(f"""
+                <div style="background: {card_colors[idx % len(card_colors)]}; border-radius: 12px; padding: 1rem; height: 220px; display: flex; flex-direction: column; justify-content: space-between; box-shadow: 0 4px 20px rgba(0, 0, 0, 0.3);">
+                    <div>
+                        <h3 style="font-size: 1.2rem; margin-bottom: 10px; color: white; font-weight: 600; white-space: nowrap; overflow: hidden; text-overflow: ellipsis;">{show}</h3>
+                        {f'<span style="font-size: 0.8rem; opacity: 0.9;">📈 {trending_shows.loc[show, "growth"]:+.0%} views</span>' if 'growth' in trending_shows.columns else ''}
+                        <div style="width: 100%; height: 3px; background: rgba(255,255,255,0.3); margin: 8px 0;"></div>
                     </div>
-                    <div style="margin: 7px 0;">
-                        <span style="font-size: 0.8rem; opacity: 0.9;">{icons["completion"]} Completion</span>
-                        <div style="font-size: 1.2rem; font-weight: 600;">{trending_shows.loc[show, 'is_completed']*100:.1f}%</div>
+                    <div>
+                        <div style="margin: 7px 0;">
+                            <span style="font-size: 0.8rem; opacity: 0.9;">{icons["viewers"]} Viewers</span>
+                            <div style="font-size: 1.2rem; font-weight: 600;">{trending_shows.loc[show, 'count']:,.0f}</div>
+                        </div>
+                        <div style="margin: 7px 0;">
+                            <span style="font-size: 0.8rem; opacity: 0.9;">{icons["watch_time"]} Avg. Watch</span>
+                            <div style="font-size: 1.2rem; font-weight: 600;">{trending_shows.loc[show, 'watch_time']:.1f} min</div>
+                        </div>
+                        <div style="margin: 7px 0;">
+                            <span style="font-size: 0.8rem; opacity: 0.9;">{icons["completion"]} Completion</span>
+                            <div style="font-size: 1.2rem; font-weight: 600;">{trending_shows.loc[show, 'is_completed']*100:.1f}%</div>
+                        </div>
                     </div>
                 </div>
-            </div>
-            """, unsafe_allow_html=True)
+                """, unsafe_allow_html=True)
+    
+    render_trending()
     
     # Warning for high drop-off
-    if completion_rate < 40:
+    if dashboard.kpis.completion_rate < 40:
         st.markdown("""
         <div style="background: linear-gradient(135deg, rgba(255, 95, 109, 0.3) 0%, rgba(255, 195, 113, 0.3) 100%); border-radius: 12px; padding: 1rem; margin: 1.5rem 0; border-left: 4px solid #FF5F6D; box-shadow: 0 4px 20px rgba(0, 0, 0, 0.1);">
             <h3 style="display: flex; align-items: center; font-size: 1.2rem; margin-bottom: 0.5rem;">
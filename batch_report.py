@@ -0,0 +1,192 @@
+"""Headless batch reports: dashboard metrics, charts and a PDF for many datasets at once
+
+Every dataset goes through the same column validation and normalization as
+an upload, then the dashboard sections are computed and written out as a
+PDF report, one PNG per chart and one CSV per section. Datasets are
+processed concurrently across a process pool.
+
+Usage:
+    python batch_report.py exports/ --output reports --workers 4
+    python batch_report.py east.csv west.xlsx --formats pdf csv
+"""
+import argparse
+import csv
+import dataclasses
+import hashlib
+import os
+import re
+import sys
+import time
+from concurrent.futures import as_completed
+
+import pandas as pd
+
+from engine import build_dashboard
+from ingestion import compact_dataset, normalize_dataset, read_csv_chunked, read_excel_streaming, validate_columns
+from parallel import default_workers, get_pool
+from reports import build_pdf_report, chart_images, dashboard_figures
+
+DATASET_SUFFIXES = ('.csv', '.xlsx')
+REPORT_FORMATS = ['pdf', 'png', 'csv']
+SUMMARY_FIELDS = ['path', 'output', 'rows', 'seconds', 'rows_per_second', 'artifacts', 'error']
+
+
+def dataset_paths(inputs):
+    """Expand files and directories into the dataset files to report on, in a stable order"""
+    paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            paths.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(DATASET_SUFFIXES)))
+        else:
+            paths.append(path)
+    return list(dict.fromkeys(paths))
+
+
+def load_dataset(path):
+    """Read, validate, normalize and compact one CSV or Excel dataset"""
+    if path.lower().endswith('.csv'):
+        df = read_csv_chunked(path)
+    else:
+        df = read_excel_streaming(path)
+    found_columns, missing_columns = validate_columns(df)
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+    return compact_dataset(normalize_dataset(df, found_columns))
+
+
+def section_tables(dashboard):
+    """The dashboard sections as ``{name: DataFrame}`` for CSV export"""
+    return {
+        'kpis': pd.DataFrame([dataclasses.asdict(dashboard.kpis)]),
+        'content': dashboard.content.counts.rename('viewers').rename_axis('content_id').reset_index(),
+        'devices': dashboard.devices.counts.rename('viewers').rename_axis('device_type').reset_index(),
+        'dropoff': pd.DataFrame({
+            'watch_time_from': dashboard.dropoff.edges[:-1],
+            'watch_time_to': dashboard.dropoff.edges[1:],
+            'viewers': dashboard.dropoff.counts.to_numpy(),
+        }),
+        'locations': dashboard.geography.locations,
+        'regions': dashboard.regions.regions,
+        'trending': dashboard.trending.shows.rename_axis('content_id').reset_index(),
+    }
+
+
+def slug(title):
+    return re.sub(r'[^a-z0-9]+', '_', title.lower()).strip('_')
+
+
+def report_dirname(path):
+    """Folder name for a dataset's artifacts, unique per input path
+
+    The file name keeps its extension and gets a short hash of the absolute
+    path, so ``east.csv``/``east.xlsx`` or two ``events.csv`` from different
+    directories never write into the same folder.
+    """
+    digest = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()[:8]
+    return f"{os.path.basename(path)}-{digest}"
+
+
+def report_dataset(path, output_dir, formats=REPORT_FORMATS):
+    """Write the report artifacts for one dataset; returns its summary row
+
+    Failures are reported in the row's ``error`` field rather than raised,
+    so one bad export does not stop the rest of the batch.
+    """
+    started = time.perf_counter()
+    directory = os.path.join(output_dir, report_dirname(path))
+    summary = {'path': path, 'output': directory, 'rows': 0, 'artifacts': 0, 'error': ''}
+    try:
+        df = load_dataset(path)
+        summary['rows'] = len(df)
+        dashboard = build_dashboard(df)
+
+        os.makedirs(directory, exist_ok=True)
+        artifacts = []
+        if 'csv' in formats:
+            for name, table in section_tables(dashboard).items():
+                artifacts.append(os.path.join(directory, f'{name}.csv'))
+                table.to_csv(artifacts[-1], index=False)
+        images = None
+        if 'pdf' in formats or 'png' in formats:
+            # Already inside a pool worker, so the charts are rendered one after another
+            images = chart_images(dashboard_figures(dashboard), workers=1)
+        if 'png' in formats:
+            for title, image in images.items():
+                if isinstance(image, bytes):
+                    artifacts.append(os.path.join(directory, f'{slug(title)}.png'))
+                    with open(artifacts[-1], 'wb') as file:
+                        file.write(image)
+        if 'pdf' in formats:
+            artifacts.append(os.path.join(directory, 'report.pdf'))
+            with open(artifacts[-1], 'wb') as file:
+                file.write(build_pdf_report(dashboard, images))
+        summary['artifacts'] = len(artifacts)
+    except Exception as e:
+        summary['error'] = f"{type(e).__name__}: {e}"
+
+    seconds = time.perf_counter() - started
+    summary['seconds'] = round(seconds, 3)
+    summary['rows_per_second'] = round(summary['rows'] / seconds) if seconds else 0
+    return summary
+
+
+def run_batch(paths, output_dir, formats=REPORT_FORMATS, workers=None, log=print):
+    """Report on every dataset, ``workers`` at a time; returns the summary rows as they finish"""
+    workers = workers or default_workers()
+    results = []
+
+    def record(summary):
+        results.append(summary)
+        if summary['error']:
+            log(f"FAILED {summary['path']}: {summary['error']}")
+        else:
+            log(f"{summary['path']}: {summary['rows']:,} rows in {summary['seconds']:.2f}s "
+                f"({summary['rows_per_second']:,} rows/s), {summary['artifacts']} artifacts")
+
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            record(report_dataset(path, output_dir, formats))
+    else:
+        pool = get_pool(workers)
+        futures = [pool.submit(report_dataset, path, output_dir, formats) for path in paths]
+        for future in as_completed(futures):
+            record(future.result())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write dashboard reports for CSV/Excel datasets without the UI")
+    parser.add_argument('inputs', nargs='+', help="dataset files and/or directories of .csv/.xlsx files")
+    parser.add_argument('--output', default='reports', help="directory for the per-dataset report folders")
+    parser.add_argument('--formats', nargs='+', choices=REPORT_FORMATS, default=REPORT_FORMATS,
+                        help="artifacts to write for each dataset")
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help="datasets processed concurrently")
+    args = parser.parse_args()
+
+    paths = dataset_paths(args.inputs)
+    if not paths:
+        parser.error("no .csv or .xlsx datasets found")
+    os.makedirs(args.output, exist_ok=True)
+
+    started = time.perf_counter()
+    results = run_batch(paths, args.output, args.formats, args.workers)
+    elapsed = time.perf_counter() - started
+
+    summary_path = os.path.join(args.output, 'batch_summary.csv')
+    with open(summary_path, 'w', newline='') as file:
+        writer = csv.DictWriter(file, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(sorted(results, key=lambda row: row['path']))
+
+    failed = sum(1 for row in results if row['error'])
+    rows = sum(row['rows'] for row in results)
+    print(f"Reported on {len(results) - failed}/{len(results)} datasets ({rows:,} rows) in {elapsed:.1f}s "
+          f"({rows / elapsed:,.0f} rows/s); summary in {summary_path}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Per-section benchmark of the dashboard pipeline over synthetic datasets
+
+Each section of the dashboard is timed at increasing dataset sizes and its
+peak traced memory is recorded in a separate run. Results go to a JSON file so runs from
+different releases can be compared.
+
+Usage:
+    python benchmark.py --sizes 10000 1000000 10000000 50000000 --output bench_results.json
+"""
+import argparse
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from aggregates import RunningAggregates
+from engine import (build_dashboard, dropoff_section, geography_section, region_section, trending_section,
+                    window_section)
+from generator import write_events
+from ingestion import (analyze_dataset, compact_dataset, memory_footprint, normalize_dataset, read_excel_streaming,
+                       validate_columns)
+from parallel import default_workers, parallel_aggregate
+from reports import build_chart_report, dashboard_figures
+from sketches import DEFAULT_TOP_K_CAPACITY
+from windows import WindowedMetrics
+
+DEFAULT_SIZES = [10_000, 1_000_000, 10_000_000, 50_000_000]
+# Rows per worksheet, less the header row
+EXCEL_MAX_ROWS = 1_048_575
+
+
+def measure(fn, *args):
+    """Run ``fn(*args)`` and return ``(result, seconds, peak_bytes)``
+
+    The time comes from a plain run; tracing every allocation slows code
+    down several times over, so peak memory is taken from a second, traced
+    run whose own duration is discarded.
+    """
+    started = time.perf_counter()
+    result = fn(*args)
+    seconds = time.perf_counter() - started
+
+    tracemalloc.start()
+    try:
+        fn(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def ingest(path):
+    """Current upload path: parse the CSV, validate columns and normalize"""
+    df = pd.read_csv(path)
+    found_columns, missing_columns = validate_columns(df)
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+    return normalize_dataset(df, found_columns)
+
+
+def ingest_excel(path):
+    """Excel upload path without streaming: load the whole sheet with pandas, validate, normalize and compact"""
+    df = pd.read_excel(path)
+    found_columns, missing_columns = validate_columns(df)
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+    return compact_dataset(normalize_dataset(df, found_columns))
+
+
+def locations(df):
+    return geography_section(df['location'].value_counts())
+
+
+def benchmark_size(rows, workdir, seed, workers, log, excel=False):
+    """Benchmark every section for one dataset size"""
+    path = os.path.join(workdir, f'events_{rows}.csv')
+    write_events(path, rows, seed=seed)
+
+    results = []
+
+    def record(section, fn, *args):
+        result, seconds, peak = measure(fn, *args)
+        results.append({'rows': rows, 'section': section, 'seconds': round(seconds, 6), 'peak_bytes': peak})
+        log(f"{rows:>12,} rows  {section:<26} {seconds:9.3f}s  {peak / 1024 ** 2:10.1f} MiB")
+        return result
+
+    try:
+        df = record('ingestion', ingest, path)
+    finally:
+        os.unlink(path)
+    if excel and rows <= EXCEL_MAX_ROWS:
+        # Same rows as a workbook, read by the current path and by the streaming reader
+        excel_path = os.path.join(workdir, f'events_{rows}.xlsx')
+        df.to_excel(excel_path, index=False)
+        try:
+            record('ingestion_excel', ingest_excel, excel_path)
+            record('ingestion_excel_streaming', read_excel_streaming, excel_path)
+        finally:
+            os.unlink(excel_path)
+    # The app holds the compact frame, so every section below runs on it
+    df = record('compact_dataset', compact_dataset, df)
+    total = memory_footprint(df).loc['total']
+    log(f"{rows:>12,} rows  {'memory':<26} {total['plain_bytes'] / 1024 ** 2:9.1f} MiB plain  "
+        f"{total['compact_bytes'] / 1024 ** 2:9.1f} MiB compact")
+    record('analyze_dataset', analyze_dataset, df)
+    # Running totals feed the KPI, breakdown and trending sections
+    running = record('aggregates', RunningAggregates.from_frame, df)
+    if workers > 1:
+        # Warm the pool so process start-up is not billed to the first size
+        parallel_aggregate(df.head(workers), workers, 0)
+        record('aggregates_parallel', parallel_aggregate, df, workers, 0)
+    # Windowed KPIs are the per-rerun KPI cost; the all-time KPIs are O(1) reads of the running totals
+    windows = record('windows', WindowedMetrics.from_frame, df)
+    record('kpis_window', window_section, windows, 15)
+    record('dropoff', dropoff_section, running)
+    geography = record('locations', locations, df)
+    record('regions', region_section, geography)
+    record('trending', trending_section, running)
+    top_titles = record('aggregates_topk', partial(RunningAggregates.from_frame, top_k=DEFAULT_TOP_K_CAPACITY), df)
+    record('trending_topk', trending_section, top_titles)
+    # The report is built from the dashboard sections with its charts rendered by kaleido, as in the app
+    dashboard = build_dashboard(df, running)
+    record('pdf_report', build_chart_report, dashboard, dashboard_figures(dashboard), workers)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark dashboard sections over synthetic datasets")
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help="dataset sizes in rows")
+    parser.add_argument('--output', default='bench_results.json', help="JSON file to write results to")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for the synthetic data")
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help="worker processes for the parallel aggregation section")
+    parser.add_argument('--workdir', default=None, help="directory for temporary CSV files")
+    parser.add_argument('--excel', action='store_true',
+                        help="also time .xlsx ingestion (pandas vs streaming) for sizes that fit in one sheet")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=args.workdir) as workdir:
+        for rows in args.sizes:
+            results.extend(benchmark_size(rows, workdir, args.seed, args.workers, print, args.excel))
+
+    report = {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Wrote {len(results)} measurements to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
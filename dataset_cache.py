@@ -0,0 +1,120 @@
+"""Content-addressed on-disk cache of validated datasets stored as Arrow IPC files"""
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+import pyarrow as pa
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'ott-dashboard')
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+CACHE_SUFFIX = '.arrow'
+SUMMARY_KEY = b'ott_dashboard_summary'
+
+
+def content_key(data, variant=''):
+    """Hash the raw uploaded bytes (plus the ingestion variant) into a cache key"""
+    digest = hashlib.sha256(data)
+    digest.update(variant.encode())
+    return digest.hexdigest()
+
+
+class DatasetCache:
+    """Stores normalized DataFrames keyed by content hash with size-based LRU eviction
+
+    Files are written uncompressed in the Arrow IPC format so that a hit can
+    memory-map the columns instead of parsing the original text again.
+    Recency is tracked through file modification times, so it survives
+    server restarts.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + CACHE_SUFFIX)
+
+    def get(self, key):
+        """Return ``(df, summary)`` for a cached dataset, or None on a miss"""
+        path = self._path(key)
+        try:
+            with pa.memory_map(path, 'r') as source:
+                table = pa.ipc.open_file(source).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid):
+            self.misses += 1
+            return None
+
+        # Mark as most recently used
+        os.utime(path)
+        self.hits += 1
+        metadata = table.schema.metadata or {}
+        summary = json.loads(metadata.get(SUMMARY_KEY, b'{}'))
+        # split_blocks lets null-free numeric columns stay views over the mapped file
+        return table.to_pandas(split_blocks=True), summary
+
+    def put(self, key, df, summary=None):
+        """Store a normalized dataset; returns False if it cannot be represented in Arrow
+
+        Datasets larger than ``max_bytes`` on their own are not cached, since
+        keeping one would push the cache past its budget.
+        """
+        try:
+            table = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            return False
+
+        metadata = dict(table.schema.metadata or {})
+        metadata[SUMMARY_KEY] = json.dumps(summary or {}).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        # Write to a temporary file first so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            if os.path.getsize(tmp_path) > self.max_bytes:
+                os.unlink(tmp_path)
+                return False
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        self.evict()
+        return True
+
+    def entries(self):
+        """Cached files as ``(mtime, size, path)`` tuples, oldest first"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(CACHE_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Evicted by another session in the meantime
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+        return sorted(entries)
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits in ``max_bytes``"""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(path)
+            total -= size
@@ -0,0 +1,295 @@
+"""Headless analytics engine: computes every dashboard section as typed results
+
+Nothing here depends on Streamlit, so sections can be timed, cached and run
+in batch jobs; ``app.py`` only renders the objects returned here.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from aggregates import RunningAggregates
+from gazetteer import get_gazetteer
+from geocoding import get_geocoder
+from windows import CONTENT_COLUMNS
+
+# Chart titles for the region rollup of each location type
+REGION_TITLES = {
+    "usa-states": "US Regional Distribution",
+    "country": "Continental Distribution",
+    "city": "Regional Distribution",
+}
+
+
+@dataclass(frozen=True)
+class KPIs:
+    """Headline metrics shown in the KPI row"""
+    total_viewers: int
+    avg_watch_time: float
+    completion_rate: float
+    # Relative standard error of total_viewers; 0 for exact counts
+    viewers_error: float = 0.0
+
+
+@dataclass(frozen=True)
+class WindowKPIs:
+    """KPIs over the last ``minutes`` and over the window just before it"""
+    minutes: int
+    current: KPIs
+    previous: KPIs
+
+    @property
+    def deltas(self):
+        """Change of each KPI against the previous window"""
+        return KPIs(self.current.total_viewers - self.previous.total_viewers,
+                    self.current.avg_watch_time - self.previous.avg_watch_time,
+                    self.current.completion_rate - self.previous.completion_rate,
+                    self.current.viewers_error)
+
+
+@dataclass(frozen=True)
+class Breakdown:
+    """Row counts per distinct value of one column, largest first"""
+    column: str
+    counts: pd.Series
+
+
+@dataclass(frozen=True)
+class Dropoff:
+    """Viewers per watch-time quantile bucket and the watch-time edges of each bucket"""
+    buckets: int
+    counts: pd.Series
+    edges: np.ndarray
+
+
+@dataclass(frozen=True)
+class Geography:
+    """Viewers per location with their coordinates and the detected kind of location"""
+    # location, viewers, plus code/lat/lon from the offline geocoding table (NaN when unresolved)
+    locations: pd.DataFrame
+    location_type: str
+    # Location names missing from the geocoding table
+    unresolved: tuple = ()
+
+
+@dataclass(frozen=True)
+class Regions:
+    """Viewers rolled up into regions for the detected location type"""
+    title: str
+    regions: pd.DataFrame
+
+
+@dataclass(frozen=True)
+class Trending:
+    """Top titles with average watch time, completion rate and view count"""
+    shows: pd.DataFrame
+    # Largest possible overestimate of a view count; 0 when every title is tracked exactly
+    count_error: int = 0
+    # Number of titles the ranking was drawn from
+    tracked: int = 0
+
+
+@dataclass(frozen=True)
+class MapFrames:
+    """Viewers per location in each time bucket, one animation frame per bucket"""
+    # frame (label), location, viewers plus code/lat/lon from the geocoding table
+    frames: pd.DataFrame
+    resolution: str
+    # Consecutive buckets merged into each frame to stay under the frame cap
+    buckets_per_frame: int
+
+
+@dataclass(frozen=True)
+class Dashboard:
+    """Every section of the dashboard for one dataset version"""
+    kpis: KPIs
+    content: Breakdown
+    devices: Breakdown
+    dropoff: Dropoff
+    geography: Geography
+    regions: Regions
+    trending: Trending
+
+
+def kpi_section(running):
+    """KPI row from the running totals"""
+    kpis = running.kpis()
+    return KPIs(kpis['total_viewers'], kpis['avg_watch_time'], kpis['completion_rate'], kpis['viewers_error'])
+
+
+def window_section(windows, minutes):
+    """KPIs for the last ``minutes`` of events and the preceding window, from the bucket ring"""
+    current, previous = windows.compare(minutes)
+    if current is None:
+        return None
+
+    def kpis(window):
+        return KPIs(window['viewers'], window['avg_watch_time'], window['completion_rate'], window['viewers_error'])
+
+    return WindowKPIs(minutes, kpis(current), kpis(previous))
+
+
+def breakdown_section(running, column):
+    """Counts per value of ``column`` from the running totals"""
+    return Breakdown(column, running.counts(column))
+
+
+def dropoff_section(running, q=10):
+    """Number of viewers per watch-time quantile bucket, read from the streaming quantile sketch"""
+    digest = running.watch_time_digest
+    if not digest.total:
+        return Dropoff(q, pd.Series(dtype='int64'), np.empty(0))
+    edges = digest.quantile(np.linspace(0, 1, q + 1))
+    shares = np.diff(digest.cdf(edges))
+    return Dropoff(q, pd.Series(np.rint(shares * digest.total).astype(np.int64)), edges)
+
+
+def geography_section(location_counts):
+    """Viewers per location plus the detected location type"""
+    location_data = location_counts.reset_index()
+    location_data.columns = ['location', 'viewers']
+    location_data['location'] = location_data['location'].astype(str)
+    location_type = get_gazetteer().location_type(location_data['location'])
+    coordinates, unresolved = get_geocoder().locate(location_data['location'], location_type)
+    return Geography(location_data.join(coordinates), location_type, tuple(unresolved))
+
+
+# Map animation bucket sizes and the cap on frames per animation
+MAP_FRAME_SECONDS = {'hour': 3600, 'day': 86400}
+MAX_MAP_FRAMES = 48
+
+
+def map_frames_section(df, location_type, resolution='hour', max_frames=MAX_MAP_FRAMES):
+    """Viewers per location for each hour or day of ``timestamp``, in one group-by
+
+    When the data spans more than ``max_frames`` buckets, consecutive
+    buckets are merged so the animation never has more frames than that.
+    """
+    timestamps = df['timestamp']
+    if not pd.api.types.is_datetime64_any_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps, errors='coerce')
+    valid = ~timestamps.isna().to_numpy()
+    columns = ['frame', 'location', 'viewers', 'code', 'lat', 'lon']
+    if not valid.any():
+        return MapFrames(pd.DataFrame(columns=columns), resolution, 1)
+
+    bucket_seconds = MAP_FRAME_SECONDS[resolution]
+    buckets = timestamps.to_numpy(dtype='datetime64[s]').astype(np.int64)[valid] // bucket_seconds
+    first = int(buckets.min())
+    step = max(-(-(int(buckets.max()) - first + 1) // max_frames), 1)
+    frame = (buckets - first) // step
+
+    frames = (pd.DataFrame({'frame': frame, 'location': df['location'].to_numpy()[valid]})
+              .groupby(['frame', 'location'], observed=True, sort=True).size()
+              .rename('viewers').reset_index())
+    frames['location'] = frames['location'].astype(str)
+    coordinates, _ = get_geocoder().locate(frames['location'], location_type)
+
+    # Label each frame with the start of its first bucket
+    occupied = np.unique(frame)
+    starts = pd.to_datetime((first + occupied * step) * bucket_seconds, unit='s')
+    labels = starts.strftime('%Y-%m-%d %H:00' if resolution == 'hour' else '%Y-%m-%d').to_numpy()
+    frames['frame'] = labels[np.searchsorted(occupied, frames['frame'].to_numpy())]
+    return MapFrames(frames.join(coordinates)[columns], resolution, step)
+
+
+def region_section(geography):
+    """Roll locations up into regions for the detected location type"""
+    locations = geography.locations
+    regions = pd.Series(get_gazetteer().regions(geography.location_type, locations['location']),
+                        index=locations.index, name='region')
+
+    # Aggregate by region
+    region_data = locations['viewers'].groupby(regions, observed=True).sum().reset_index()
+    region_data['region'] = region_data['region'].astype(str)
+    return Regions(REGION_TITLES[geography.location_type], region_data)
+
+
+def trending_section(running, n=5):
+    """Top ``n`` titles by average watch time from the per-title running sums
+
+    With a bounded ``top_k`` the ranking is drawn from the heavy-hitter
+    titles only. A partial selection is used rather than a full sort.
+    """
+    trending = running.content_table()
+    shows = trending.nlargest(n, 'watch_time')
+    return Trending(shows, int(trending['error'].max()) if len(trending) else 0, len(trending))
+
+
+# Weight of the change in growth rate relative to the growth rate itself
+VELOCITY_ACCELERATION_WEIGHT = 0.5
+DEFAULT_VELOCITY_MINUTES = 15
+
+
+def velocity_section(windows, minutes=DEFAULT_VELOCITY_MINUTES, n=5):
+    """Top ``n`` titles by trend velocity over the last ``minutes`` of events
+
+    Views in the current window are compared with the two windows before
+    it: growth is the smoothed log ratio of views, acceleration the change
+    in growth, and together they scale a completion-weighted engagement
+    term so that rising titles people actually finish rank first. Every
+    title is scored at once from the bucketed per-title counts.
+    """
+    activity = windows.content_activity(minutes, periods=3)
+    views, completed, watch_time = (activity[name].to_numpy() for name in CONTENT_COLUMNS)
+    current, previous, earlier = views.T
+    # Log ratios keep a title appearing from nothing from dominating on a near-zero base
+    growth = np.log1p(current) - np.log1p(previous)
+    acceleration = growth - (np.log1p(previous) - np.log1p(earlier))
+    # Laplace smoothing keeps single-view titles from scoring a perfect completion rate
+    engagement = np.log1p(current) * (completed[:, 0] + 1) / (current + 2)
+    score = engagement * np.exp(growth + VELOCITY_ACCELERATION_WEIGHT * acceleration)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table = pd.DataFrame({
+            'watch_time': watch_time[:, 0] / current,
+            'is_completed': completed[:, 0] / current,
+            'count': current.astype(np.int64),
+            # Relative change in views against the previous window
+            'growth': np.expm1(growth),
+            'acceleration': acceleration,
+            'score': score,
+        }, index=activity.index.rename('content_id'))
+    active = table[table['count'] > 0]
+    return Trending(active.nlargest(n, 'score'), 0, len(active))
+
+
+def memoized(cache, version, name, compute, data, **params):
+    """``compute(data, **params)``, memoized per dataset version when a cache is given"""
+    if cache is None or version is None:
+        return compute(data, **params)
+    return cache.get(version, name, compute, data, **params)
+
+
+def select_trending(running, windows=None, cache=None, version=None, trending_by='watch_time',
+                    velocity_minutes=DEFAULT_VELOCITY_MINUTES):
+    """Trending titles by average watch time, or with ``trending_by='velocity'`` by trend velocity"""
+    if trending_by == 'velocity' and windows is not None:
+        return memoized(cache, version, 'velocity', velocity_section, windows, minutes=velocity_minutes, n=5)
+    # The same dataset version is aggregated exactly or with a bounded top-k, depending on the options
+    return memoized(cache, version, ('trending', running.top_k), trending_section, running, n=5)
+
+
+def build_dashboard(df, running=None, cache=None, version=None, dropoff_buckets=10,
+                    windows=None, trending_by='watch_time', velocity_minutes=DEFAULT_VELOCITY_MINUTES):
+    """Compute every dashboard section for a normalized DataFrame
+
+    ``running`` supplies incrementally maintained totals (built from ``df``
+    when omitted). With an ``AggregateCache`` and a dataset ``version``, the
+    row-proportional sections are memoized per version. Trending titles are
+    ranked by average watch time, or with ``trending_by='velocity'`` by
+    trend velocity over the ``windows`` bucket ring.
+    """
+    if running is None:
+        running = RunningAggregates.from_frame(df)
+
+    geography = memoized(cache, version, 'geography', geography_section, running.counts('location'))
+    return Dashboard(
+        kpis=kpi_section(running),
+        content=breakdown_section(running, 'content_id'),
+        devices=breakdown_section(running, 'device_type'),
+        dropoff=memoized(cache, version, 'dropoff', dropoff_section, running, q=dropoff_buckets),
+        geography=geography,
+        regions=memoized(cache, version, 'regions', region_section, geography),
+        trending=select_trending(running, windows, cache, version, trending_by, velocity_minutes),
+    )
@@ -0,0 +1,347 @@
+"""Plotly figure builders for the dashboard charts and a cache of built figures"""
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+DEFAULT_MAX_FIGURES = 64
+
+
+def fingerprint(*inputs):
+    """Content hash of the aggregates a figure is built from"""
+    digest = hashlib.sha1()
+    for value in inputs:
+        if isinstance(value, (pd.Series, pd.DataFrame)):
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+            columns = value.columns if isinstance(value, pd.DataFrame) else [value.name]
+            digest.update(repr(list(columns)).encode())
+        elif isinstance(value, np.ndarray):
+            digest.update(np.ascontiguousarray(value).tobytes())
+        else:
+            digest.update(repr(value).encode())
+    return digest.hexdigest()
+
+
+class FigureStats:
+    """Figure cache hits, misses and construction time saved during one script run"""
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class FigureCache:
+    """Thread-safe LRU cache of built figures keyed by ``(name, input fingerprint, options)``
+
+    A figure is rebuilt only when the aggregates behind it or its styling
+    options change. Each entry remembers how long it took to build, so a hit
+    can report the construction time it saved.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_FIGURES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.seconds_saved = 0.0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, name, build, *inputs, stats=None, **options):
+        """Return the cached figure, building ``build(*inputs, **options)`` on a miss"""
+        key = (name, fingerprint(*inputs), tuple(sorted(options.items())))
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                figure, seconds = self._entries[key]
+                self.hits += 1
+                self.seconds_saved += seconds
+                if stats is not None:
+                    stats.hits += 1
+                    stats.seconds_saved += seconds
+                return figure
+            self.misses += 1
+            if stats is not None:
+                stats.misses += 1
+
+        started = time.perf_counter()
+        figure = build(*inputs, **options)
+        seconds = time.perf_counter() - started
+        with self._lock:
+            self._entries[key] = (figure, seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return figure
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def content_pie(content_viewers):
+    """Active viewers by content (3D Donut Chart)"""
+    fig_content = go.Figure(data=[go.Pie(
+        labels=content_viewers.index,
+        values=content_viewers.values,
+        hole=0.5,
+        textinfo='label+percent',
+        marker=dict(
+            colors=px.colors.sequential.Plasma,
+            line=dict(color='rgba(255, 255, 255, 0.5)', width=1)
+        )
+    )])
+    fig_content.update_layout(
+        title="Active Viewers by Content",
+        showlegend=False,
+        height=400,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="white"),
+        margin=dict(l=20, r=20, t=40, b=20),
+    )
+    return fig_content
+
+
+def device_pie(device_usage):
+    """Device usage breakdown (3D Pie Chart)"""
+    fig_devices = go.Figure(data=[go.Pie(
+        labels=device_usage.index,
+        values=device_usage.values,
+        textinfo='label+percent',
+        marker=dict(
+            colors=px.colors.sequential.Viridis,
+            line=dict(color='rgba(255, 255, 255, 0.5)', width=1)
+        )
+    )])
+    fig_devices.update_layout(
+        title="Device Usage Breakdown",
+        showlegend=False,
+        height=400,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="white"),
+        margin=dict(l=20, r=20, t=40, b=20),
+    )
+    return fig_devices
+
+
+def dropoff_chart(dropoff_data, dropoff_edges, buckets):
+    """Viewers per watch-time quantile bucket"""
+    fig_dropoff = go.Figure()
+    fig_dropoff.add_trace(go.Scatter(
+        x=np.arange(len(dropoff_data)) * 100 / buckets,
+        y=dropoff_data.values,
+        customdata=np.column_stack([dropoff_edges[:-1], dropoff_edges[1:]]) if len(dropoff_edges) else None,
+        hovertemplate="Percentile %{x:.0f}: %{y:,} viewers<br>Watch time %{customdata[0]:.1f}–%{customdata[1]:.1f} min<extra></extra>",
+        mode='lines+markers',
+        name='Viewers',
+        line=dict(width=3, color='#4A00E0'),
+        marker=dict(
+            size=8,
+            color=dropoff_data.values,
+            colorscale='Viridis',
+            line=dict(width=1, color='rgba(255, 255, 255, 0.5)')
+        ),
+        fill='tozeroy',
+        fillcolor='rgba(74, 0, 224, 0.2)'
+    ))
+    fig_dropoff.update_layout(
+        title=None,
+        xaxis_title="Watch Time Percentile",
+        yaxis_title="Number of Viewers",
+        height=400,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="white"),
+        margin=dict(l=20, r=20, t=10, b=20),
+        xaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            showline=True,
+            linecolor='rgba(255, 255, 255, 0.2)',
+        ),
+        yaxis=dict(
+            showgrid=True,
+            gridcolor='rgba(255, 255, 255, 0.1)',
+            showline=True,
+            linecolor='rgba(255, 255, 255, 0.2)',
+        )
+    )
+    return fig_dropoff
+
+
+def location_map(location_data, location_type, frames, scope, map_viz_type):
+    """Bubble map or choropleth of viewers per location
+
+    ``frames`` (the table of a ``MapFrames`` section, or None) animates the
+    bubble map over its time buckets. The play speed is not part of the figure;
+    see ``with_animation_speed``.
+    """
+    # Determine appropriate settings based on location type and scope
+    if location_type == "usa-states" and scope == "usa":
+        projection = "albers usa"
+    elif scope == "world" or scope in ["europe", "asia", "north america"]:
+        projection = "natural earth"
+    else:
+        projection = "mercator"
+    # Choropleths shade regions by their state or ISO-3 country code from the geocoding table
+    locationmode = "USA-states" if location_type == "usa-states" else "ISO-3"
+
+    # Create the appropriate map based on user selection
+    if map_viz_type == "Bubble Map":
+        # For bubble map (scatter geo), placed by the geocoded coordinates
+        located = location_data.dropna(subset=['lat', 'lon'])
+        enable_animation = frames is not None
+        fig_map = px.scatter_geo(
+            frames.dropna(subset=['lat', 'lon']) if enable_animation else located,
+            lat='lat',
+            lon='lon',
+            size='viewers',
+            color='viewers',
+            color_continuous_scale=px.colors.sequential.Plasma,
+            scope=scope,
+            projection=projection,
+            title='Global Viewership Distribution',
+            hover_name='location',
+            hover_data={
+                'lat': False,
+                'lon': False,
+                'viewers': True,
+            },
+            size_max=50,
+            animation_frame='frame' if enable_animation else None,
+            animation_group='location' if enable_animation else None,
+        )
+
+    else:
+        # For choropleth map
+        if scope == "usa":
+            # US State level choropleth
+            fig_map = px.choropleth(
+                location_data.dropna(subset=['code']),
+                locationmode=locationmode,
+                locations='code',
+                color='viewers',
+                scope=scope,
+                color_continuous_scale=px.colors.sequential.Plasma,
+                title='Viewership Density by Region',
+                hover_name='location',
+                hover_data={
+                    'code': False,
+                    'viewers': True,
+                },
+            )
+        else:
+            # Country level choropleth
+            fig_map = px.choropleth(
+                location_data.dropna(subset=['code']),
+                locationmode=locationmode,
+                locations='code',
+                color='viewers',
+                scope=scope,
+                color_continuous_scale=px.colors.sequential.Plasma,
+                projection=projection,
+                title='Global Viewership Density',
+                hover_name='location',
+                hover_data={
+                    'code': False,
+                    'viewers': True,
+                },
+            )
+
+    # Enhance map styling
+    fig_map.update_geos(
+        showcoastlines=True, coastlinecolor="white",
+        showland=True, landcolor="rgb(17, 17, 17)",
+        showocean=True, oceancolor="rgb(10, 10, 30)",
+        showlakes=True, lakecolor="rgb(17, 17, 17)",
+        showrivers=True, rivercolor="rgb(17, 17, 17)",
+        showcountries=True, countrycolor="white",
+        showsubunits=True, subunitcolor="white",
+        resolution=110,
+        bgcolor="rgba(0,0,0,0)"
+    )
+
+    # Improve layout
+    fig_map.update_layout(
+        height=600,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        margin=dict(l=0, r=0, t=30, b=0),
+        coloraxis_colorbar=dict(
+            title="Viewers",
+            thicknessmode="pixels", thickness=20,
+            lenmode="pixels", len=400,
+            yanchor="top", y=1,
+            ticks="outside"
+        ),
+        geo=dict(
+            bgcolor="rgba(0,0,0,0)",
+        )
+    )
+
+    # Add city labels for top cities if using bubble map
+    if map_viz_type == "Bubble Map":
+        top_locations = located.nlargest(5, 'viewers')
+        fig_map.add_trace(go.Scattergeo(
+            lat=top_locations['lat'],
+            lon=top_locations['lon'],
+            text=[f"{row.location}: {row.viewers}" for row in top_locations.itertuples()],
+            mode='text',
+            textposition='top center',
+            textfont=dict(size=14, color="white"),
+            hoverinfo='skip',
+            showlegend=False,
+        ))
+    return fig_map
+
+
+def with_animation_speed(fig_map, animation_speed):
+    """Copy of an animated map whose play button advances a frame every ``animation_speed`` ms
+
+    Copying the cached figure is much cheaper than building its frames
+    again, and leaves the cached figure untouched for other sessions.
+    """
+    fig_map = go.Figure(fig_map)
+    if fig_map.layout.updatemenus:
+        fig_map.layout.updatemenus[0].buttons[0].args[1]['frame']['duration'] = animation_speed
+    return fig_map
+
+
+def region_bar(region_data, region_title):
+    """Horizontal bar chart of viewers per region"""
+    fig_regions = px.bar(
+        region_data.sort_values('viewers', ascending=True),
+        y='region',
+        x='viewers',
+        orientation='h',
+        color='viewers',
+        color_continuous_scale=px.colors.sequential.Viridis,
+        title=region_title
+    )
+
+    fig_regions.update_layout(
+        height=300,
+        xaxis_title="Number of Viewers",
+        yaxis_title=None,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font=dict(color="white"),
+        margin=dict(l=0, r=0, t=30, b=0),
+    )
+    return fig_regions
@@ -0,0 +1,314 @@
+"""Location gazetteer: a normalized name/alias index and substring matcher built once per process"""
+import re
+import threading
+import unicodedata
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Known locations per location type
+US_STATES = ["Alabama", "Alaska", "Arizona", "Arkansas", "California", "Colorado", "Connecticut",
+           "Delaware", "Florida", "Georgia", "Hawaii", "Idaho", "Illinois", "Indiana", "Iowa",
+           "Kansas", "Kentucky", "Louisiana", "Maine", "Maryland", "Massachusetts", "Michigan",
+           "Minnesota", "Mississippi", "Missouri", "Montana", "Nebraska", "Nevada", "New Hampshire",
+           "New Jersey", "New Mexico", "New York", "North Carolina", "North Dakota", "Ohio", "Oklahoma",
+           "Oregon", "Pennsylvania", "Rhode Island", "South Carolina", "South Dakota", "Tennessee",
+           "Texas", "Utah", "Vermont", "Virginia", "Washington", "West Virginia", "Wisconsin", "Wyoming",
+           "District of Columbia"]
+
+US_STATE_ABBREVS = ["AL", "AK", "AZ", "AR", "CA", "CO", "CT", "DE", "FL", "GA", "HI", "ID", "IL",
+                   "IN", "IA", "KS", "KY", "LA", "ME", "MD", "MA", "MI", "MN", "MS", "MO", "MT",
+                   "NE", "NV", "NH", "NJ", "NM", "NY", "NC", "ND", "OH", "OK", "OR", "PA", "RI",
+                   "SC", "SD", "TN", "TX", "UT", "VT", "VA", "WA", "WV", "WI", "WY", "DC"]
+
+MAJOR_COUNTRIES = ["United States", "Canada", "Mexico", "Brazil", "Argentina", "United Kingdom",
+                  "France", "Germany", "Italy", "Spain", "Russia", "China", "Japan", "India",
+                  "Australia", "New Zealand", "South Africa", "Nigeria", "Egypt", "Saudi Arabia"]
+
+MAJOR_CITIES = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio",
+               "San Diego", "Dallas", "San Jose", "London", "Paris", "Tokyo", "Mumbai", "Sydney",
+               "Singapore", "Hong Kong", "Dubai", "Toronto", "Mexico City"]
+
+# Region rollups per location type
+US_STATE_REGIONS = {
+    "New York": "Northeast", "Massachusetts": "Northeast", "Rhode Island": "Northeast",
+    "Connecticut": "Northeast", "Vermont": "Northeast", "New Hampshire": "Northeast",
+    "Maine": "Northeast", "Pennsylvania": "Northeast", "New Jersey": "Northeast",
+    "California": "West", "Washington": "West", "Oregon": "West", "Nevada": "West",
+    "Idaho": "West", "Montana": "West", "Wyoming": "West", "Utah": "West",
+    "Colorado": "West", "Alaska": "West", "Hawaii": "West", "Arizona": "Southwest",
+    "New Mexico": "Southwest", "Texas": "Southwest", "Oklahoma": "Southwest",
+    "Illinois": "Midwest", "Ohio": "Midwest", "Michigan": "Midwest", "Indiana": "Midwest",
+    "Wisconsin": "Midwest", "Minnesota": "Midwest", "Iowa": "Midwest",
+    "Missouri": "Midwest", "North Dakota": "Midwest", "South Dakota": "Midwest",
+    "Nebraska": "Midwest", "Kansas": "Midwest",
+    "Florida": "Southeast", "Georgia": "Southeast", "North Carolina": "Southeast",
+    "South Carolina": "Southeast", "Virginia": "Southeast", "West Virginia": "Southeast",
+    "Kentucky": "Southeast", "Tennessee": "Southeast", "Alabama": "Southeast",
+    "Mississippi": "Southeast", "Arkansas": "Southeast", "Louisiana": "Southeast",
+    "Delaware": "Southeast", "Maryland": "Southeast", "District of Columbia": "Southeast",
+    "NY": "Northeast", "MA": "Northeast", "RI": "Northeast", "CT": "Northeast",
+    "VT": "Northeast", "NH": "Northeast", "ME": "Northeast", "PA": "Northeast",
+    "NJ": "Northeast", "CA": "West", "WA": "West", "OR": "West", "NV": "West",
+    "ID": "West", "MT": "West", "WY": "West", "UT": "West", "CO": "West",
+    "AK": "West", "HI": "West", "AZ": "Southwest", "NM": "Southwest",
+    "TX": "Southwest", "OK": "Southwest", "IL": "Midwest", "OH": "Midwest",
+    "MI": "Midwest", "IN": "Midwest", "WI": "Midwest", "MN": "Midwest",
+    "IA": "Midwest", "MO": "Midwest", "ND": "Midwest", "SD": "Midwest",
+    "NE": "Midwest", "KS": "Midwest", "FL": "Southeast", "GA": "Southeast",
+    "NC": "Southeast", "SC": "Southeast", "VA": "Southeast", "WV": "Southeast",
+    "KY": "Southeast", "TN": "Southeast", "AL": "Southeast", "MS": "Southeast",
+    "AR": "Southeast", "LA": "Southeast", "DE": "Southeast", "MD": "Southeast",
+    "DC": "Southeast"
+}
+
+COUNTRY_REGIONS = {
+    "United States": "North America", "Canada": "North America", "Mexico": "North America",
+    "Brazil": "South America", "Argentina": "South America", "Chile": "South America",
+    "Colombia": "South America", "Peru": "South America", "Venezuela": "South America",
+    "United Kingdom": "Europe", "France": "Europe", "Germany": "Europe", "Italy": "Europe",
+    "Spain": "Europe", "Portugal": "Europe", "Netherlands": "Europe", "Belgium": "Europe",
+    "Switzerland": "Europe", "Austria": "Europe", "Sweden": "Europe", "Norway": "Europe",
+    "Denmark": "Europe", "Finland": "Europe", "Greece": "Europe", "Ireland": "Europe",
+    "Russia": "Europe", "Ukraine": "Europe", "Poland": "Europe", "Romania": "Europe",
+    "China": "Asia", "Japan": "Asia", "South Korea": "Asia", "North Korea": "Asia",
+    "India": "Asia", "Pakistan": "Asia", "Bangladesh": "Asia", "Indonesia": "Asia",
+    "Thailand": "Asia", "Vietnam": "Asia", "Malaysia": "Asia", "Singapore": "Asia",
+    "Philippines": "Asia", "Taiwan": "Asia", "Hong Kong": "Asia",
+    "Australia": "Oceania", "New Zealand": "Oceania",
+    "Egypt": "Africa", "South Africa": "Africa", "Nigeria": "Africa", "Kenya": "Africa",
+    "Morocco": "Africa", "Algeria": "Africa", "Tunisia": "Africa", "Ghana": "Africa",
+    "Saudi Arabia": "Middle East", "UAE": "Middle East", "Qatar": "Middle East",
+    "Israel": "Middle East", "Turkey": "Middle East", "Iran": "Middle East"
+}
+
+CITY_REGIONS = {
+    'New York': 'East Coast',
+    'Boston': 'East Coast',
+    'Philadelphia': 'East Coast',
+    'Los Angeles': 'West Coast',
+    'San Francisco': 'West Coast',
+    'Seattle': 'West Coast',
+    'Portland': 'West Coast',
+    'Chicago': 'Midwest',
+    'Detroit': 'Midwest',
+    'Minneapolis': 'Midwest',
+    'Houston': 'South',
+    'Dallas': 'South',
+    'Miami': 'South',
+    'Atlanta': 'South',
+    'Phoenix': 'Southwest',
+    'Denver': 'Southwest',
+    'Las Vegas': 'Southwest',
+    'London': 'Europe',
+    'Paris': 'Europe',
+    'Berlin': 'Europe',
+    'Rome': 'Europe',
+    'Madrid': 'Europe',
+    'Tokyo': 'Asia',
+    'Seoul': 'Asia',
+    'Beijing': 'Asia',
+    'Shanghai': 'Asia',
+    'Mumbai': 'Asia',
+    'Sydney': 'Australia',
+    'Melbourne': 'Australia',
+    'Auckland': 'Australia',
+    'Toronto': 'Canada',
+    'Vancouver': 'Canada',
+    'Montreal': 'Canada',
+    'Mexico City': 'Latin America',
+    'São Paulo': 'Latin America',
+    'Buenos Aires': 'Latin America'
+}
+
+# Alternative spellings resolved to the canonical names above
+ALIASES = {
+    'usa-states': {
+        **{state: [abbrev] for state, abbrev in zip(US_STATES, US_STATE_ABBREVS)},
+        'District of Columbia': ['DC', 'Washington DC'],
+    },
+    'country': {
+        'United States': ['USA', 'US', 'U.S.', 'U.S.A.', 'United States of America', 'America'],
+        'United Kingdom': ['UK', 'U.K.', 'Great Britain', 'Britain', 'England'],
+        'UAE': ['United Arab Emirates'],
+        'South Korea': ['Korea', 'Republic of Korea'],
+        'Russia': ['Russian Federation'],
+        'Turkey': ['Türkiye'],
+    },
+    'city': {
+        'New York': ['NYC', 'New York City'],
+        'Mumbai': ['Bombay'],
+        'Mexico City': ['CDMX', 'Ciudad de México'],
+    },
+}
+
+LOCATION_TYPES = ['usa-states', 'country', 'city']
+UNMAPPED_REGION = 'Other'
+# A location type is chosen once this share of the distinct locations matches it
+LOCATION_TYPE_THRESHOLD = 0.3
+# Resolved names remembered per location type before the memo is reset
+MAX_MEMO_ENTRIES = 100_000
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_name(name):
+    """Case-, accent- and punctuation-insensitive form of a location name
+
+    Periods are dropped ("D.C." -> "dc") and other punctuation becomes a
+    space, so words are always separated by exactly one space.
+    """
+    text = unicodedata.normalize('NFKD', str(name))
+    text = ''.join(char for char in text if not unicodedata.combining(char)).casefold().replace('.', '')
+    return ' '.join(_PUNCTUATION.sub(' ', text).split())
+
+
+class AhoCorasick:
+    """Multi-pattern matcher that finds the longest pattern occurring as whole words in a text
+
+    The trie of every pattern is walked once per character of the text, so
+    a lookup costs O(len(text)) however many patterns there are. Patterns
+    and texts are padded with a space on both sides, which makes matches
+    line up with word boundaries ("Paris" does not match "Comparison").
+    """
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        # Index of the longest pattern ending at each state (via failure links), or -1
+        self._output = [-1]
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in f' {pattern} ':
+                if char not in self._goto[state]:
+                    self._goto.append({})
+                    self._output.append(-1)
+                    self._goto[state][char] = len(self._goto) - 1
+                state = self._goto[state][char]
+            self._output[state] = index
+
+        # Breadth-first pass for the failure links; a state's own pattern is longer than any inherited one
+        self._fail = [0] * len(self._goto)
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                if state:
+                    fail = self._fail[state]
+                    while fail and char not in self._goto[fail]:
+                        fail = self._fail[fail]
+                    self._fail[child] = self._goto[fail].get(char, 0)
+                if self._output[child] == -1:
+                    self._output[child] = self._output[self._fail[child]]
+                queue.append(child)
+
+    def longest(self, text):
+        """Index of the longest pattern found in ``text``, or -1"""
+        best, best_length = -1, 0
+        state = 0
+        for char in f' {text} ':
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            match = self._output[state]
+            if match != -1 and len(self.patterns[match]) > best_length:
+                best, best_length = match, len(self.patterns[match])
+        return best
+
+
+class Gazetteer:
+    """Known states, countries and cities with their region rollups
+
+    Each location type has its own entries (canonical names), an exact
+    index over the normalized names and aliases, and the region of every
+    entry as a categorical code. Types listed in ``substring_types`` also
+    get an ``AhoCorasick`` matcher, so "Dallas, TX" resolves to Dallas.
+    Location columns are resolved per distinct value and the result is
+    broadcast back through the categorical codes, so the per-name work is
+    proportional to the number of distinct locations, not rows.
+    """
+
+    def __init__(self, names, regions, aliases, substring_types=('city',)):
+        self.entries = {}
+        self.region_names = {}
+        self._region_codes = {}
+        self._index = {}
+        self._matchers = {}
+        self._memo = {kind: {} for kind in LOCATION_TYPES}
+        self._memo_lock = threading.Lock()
+        for kind in LOCATION_TYPES:
+            entries, index = [], {}
+            # Names that only appear in the aliases or the region rollup are entries too
+            for name in list(names[kind]) + list(aliases.get(kind, {})) + list(regions[kind]):
+                if normalize_name(name) not in index:
+                    index[normalize_name(name)] = len(entries)
+                    entries.append(name)
+                for alternative in aliases.get(kind, {}).get(name, []):
+                    index.setdefault(normalize_name(alternative), index[normalize_name(name)])
+
+            region_names = sorted(set(regions[kind].values())) + [UNMAPPED_REGION]
+            region_codes = np.full(len(entries), len(region_names) - 1, dtype=np.int32)
+            lookup = {region: code for code, region in enumerate(region_names)}
+            for name, region in regions[kind].items():
+                region_codes[index[normalize_name(name)]] = lookup[region]
+
+            self.entries[kind] = entries
+            self.region_names[kind] = region_names
+            self._region_codes[kind] = region_codes
+            self._index[kind] = index
+            if kind in substring_types:
+                keys = list(index)
+                self._matchers[kind] = (AhoCorasick(keys), np.array([index[key] for key in keys]))
+
+    def lookup(self, kind, name):
+        """Entry number of ``name`` for a location type, or -1 when it is unknown"""
+        memo = self._memo[kind]
+        entry = memo.get(name)
+        if entry is not None:
+            return entry
+        key = normalize_name(name)
+        entry = self._index[kind].get(key, -1)
+        if entry == -1 and kind in self._matchers:
+            matcher, entries = self._matchers[kind]
+            match = matcher.longest(key)
+            entry = int(entries[match]) if match != -1 else -1
+        with self._memo_lock:
+            if len(memo) >= MAX_MEMO_ENTRIES:
+                memo.clear()
+            memo[name] = entry
+        return entry
+
+    def resolve(self, kind, locations):
+        """Entry number (or -1) for every value of a location column"""
+        codes, uniques = pd.factorize(pd.Series(locations, dtype='object').astype(str))
+        entries = np.fromiter((self.lookup(kind, name) for name in uniques), dtype=np.int64, count=len(uniques))
+        return entries[codes] if len(codes) else np.empty(0, dtype=np.int64)
+
+    def location_type(self, locations):
+        """The location type most of ``locations`` belong to (states, then countries, else cities)"""
+        total = len(locations)
+        if not total:
+            return 'city'
+        for kind in ['usa-states', 'country']:
+            if (self.resolve(kind, locations) >= 0).sum() / total > LOCATION_TYPE_THRESHOLD:
+                return kind
+        return 'city'
+
+    def regions(self, kind, locations):
+        """Region of every location as a Categorical; unknown locations are ``UNMAPPED_REGION``"""
+        entries = self.resolve(kind, locations)
+        region_names = self.region_names[kind]
+        codes = np.where(entries >= 0, self._region_codes[kind][np.maximum(entries, 0)], len(region_names) - 1)
+        return pd.Categorical.from_codes(codes, categories=region_names)
+
+
+@lru_cache(maxsize=None)
+def get_gazetteer():
+    """The process-wide gazetteer, built on first use"""
+    return Gazetteer(
+        names={'usa-states': US_STATES, 'country': MAJOR_COUNTRIES, 'city': MAJOR_CITIES},
+        regions={'usa-states': US_STATE_REGIONS, 'country': COUNTRY_REGIONS, 'city': CITY_REGIONS},
+        aliases=ALIASES,
+    )
@@ -0,0 +1,183 @@
+"""Vectorized synthetic viewer-event generator for demos and load testing
+
+Usage:
+    python generator.py --rows 10000000 --output events.parquet --seed 42
+    python generator.py --rows 1000000 --post http://127.0.0.1:8765/events --batch-size 5000
+"""
+import argparse
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+DEVICE_TYPES = ['mobile', 'tablet', 'tv', 'web']
+DEVICE_WEIGHTS = [0.4, 0.1, 0.3, 0.2]
+
+CITY_NAMES = ['New York', 'Los Angeles', 'Chicago', 'Houston', 'Phoenix', 'Philadelphia', 'San Antonio',
+              'San Diego', 'Dallas', 'San Jose', 'London', 'Paris', 'Tokyo', 'Mumbai', 'Sydney',
+              'Singapore', 'Hong Kong', 'Dubai', 'Toronto', 'Mexico City']
+
+DEFAULT_CHUNK_SIZE = 1_000_000
+
+
+def _labels(spec, prefix, builtin=None):
+    """Expand a cardinality into labels, or pass an explicit label list through"""
+    if not isinstance(spec, int):
+        return list(spec)
+    builtin = builtin or []
+    extra = [f'{prefix}_{i:05d}' for i in range(max(spec - len(builtin), 0))]
+    return (builtin + extra)[:spec]
+
+
+def zipf_weights(n, a):
+    """Bounded Zipf probabilities p(k) ~ 1 / k**a for ranks 1..n (a=0 is uniform)"""
+    weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** a
+    return weights / weights.sum()
+
+
+def iter_events(n_rows, contents=500, locations=50, n_users=100_000, span=timedelta(days=1), end=None,
+                zipf_a=1.1, completion_rate=0.7, watch_time_mean=30.0, watch_time_std=10.0,
+                seed=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield DataFrames of synthetic events, ``chunk_size`` rows at a time
+
+    ``contents`` and ``locations`` are either cardinalities or explicit label
+    lists; both follow a Zipf popularity curve with exponent ``zipf_a``.
+    ``n_users=None`` gives every row its own sequential viewer id.
+    Timestamps are spread uniformly over ``span`` ending at ``end``.
+    """
+    rng = np.random.default_rng(seed)
+    content_labels = _labels(contents, 'Show')
+    location_labels = _labels(locations, 'City', CITY_NAMES)
+    content_p = zipf_weights(len(content_labels), zipf_a)
+    location_p = zipf_weights(len(location_labels), zipf_a)
+    content_dtype = pd.CategoricalDtype(content_labels)
+    location_dtype = pd.CategoricalDtype(location_labels)
+    device_dtype = pd.CategoricalDtype(DEVICE_TYPES)
+
+    end = np.datetime64(end or datetime.now(), 's')
+    span_seconds = max(int(span.total_seconds()), 1)
+
+    for start in range(0, n_rows, chunk_size):
+        size = min(chunk_size, n_rows - start)
+        if n_users is None:
+            user_id = np.arange(start + 1, start + size + 1, dtype=np.int64)
+        else:
+            user_id = rng.integers(1, n_users + 1, size, dtype=np.int64)
+        offsets = rng.integers(0, span_seconds, size).astype('timedelta64[s]')
+        watch_time = rng.normal(watch_time_mean, watch_time_std, size).astype(np.float32)
+
+        yield pd.DataFrame({
+            'user_id': user_id,
+            'content_id': pd.Categorical.from_codes(rng.choice(len(content_labels), size, p=content_p),
+                                                    dtype=content_dtype),
+            'timestamp': (end - offsets).astype('datetime64[ns]'),
+            'watch_time': np.clip(watch_time, 0, None),
+            'device_type': pd.Categorical.from_codes(rng.choice(len(DEVICE_TYPES), size, p=DEVICE_WEIGHTS),
+                                                     dtype=device_dtype),
+            'location': pd.Categorical.from_codes(rng.choice(len(location_labels), size, p=location_p),
+                                                  dtype=location_dtype),
+            'is_completed': rng.random(size) < completion_rate,
+        })
+
+
+def generate_events(n_rows, **options):
+    """Generate ``n_rows`` synthetic events as a single DataFrame"""
+    options.setdefault('chunk_size', max(n_rows, 1))
+    chunks = list(iter_events(n_rows, **options))
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def _to_arrow(chunk):
+    """Arrow table with plain string labels and second-resolution timestamps, ready for writing"""
+    table = pa.Table.from_pandas(chunk, preserve_index=False)
+    for name in ['content_id', 'device_type', 'location']:
+        index = table.schema.get_field_index(name)
+        table = table.set_column(index, name, table.column(name).cast(pa.string()))
+    index = table.schema.get_field_index('timestamp')
+    return table.set_column(index, 'timestamp', table.column('timestamp').cast(pa.timestamp('s')))
+
+
+def write_events(path, n_rows, **options):
+    """Stream synthetic events straight to a CSV or Parquet file; returns rows written"""
+    rows = 0
+    writer = None
+    try:
+        for chunk in iter_events(n_rows, **options):
+            table = _to_arrow(chunk)
+            if writer is None:
+                if path.endswith('.parquet'):
+                    writer = pq.ParquetWriter(path, table.schema)
+                else:
+                    writer = pa_csv.CSVWriter(path, table.schema)
+            writer.write_table(table)
+            rows += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def post_events(url, n_rows, batch_size=1000, **options):
+    """Push synthetic events to a listener as JSON-lines batches; returns (rows sent, retries)
+
+    Batches answered with 503 (queue full) are retried after the
+    server's ``Retry-After`` delay.
+    """
+    rows = 0
+    retries = 0
+    for chunk in iter_events(n_rows, chunk_size=batch_size, **options):
+        body = chunk.to_json(orient='records', lines=True, date_format='iso').encode()
+        while True:
+            request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/x-ndjson'})
+            try:
+                urllib.request.urlopen(request).close()
+                break
+            except urllib.error.HTTPError as e:
+                if e.code != 503:
+                    raise
+                retries += 1
+                time.sleep(float(e.headers.get('Retry-After', 1)))
+        rows += len(chunk)
+    return rows, retries
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic OTT viewer events")
+    parser.add_argument('--rows', type=int, default=1_000_000, help="number of events to generate")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--output', help="destination .csv or .parquet file")
+    target.add_argument('--post', metavar='URL', help="push events to a running dashboard listener instead")
+    parser.add_argument('--batch-size', type=int, default=1000, help="events per request with --post")
+    parser.add_argument('--contents', type=int, default=500, help="number of distinct titles")
+    parser.add_argument('--locations', type=int, default=50, help="number of distinct locations")
+    parser.add_argument('--users', type=int, default=100_000, help="number of distinct viewers")
+    parser.add_argument('--span-hours', type=float, default=24.0, help="time span covered by the events")
+    parser.add_argument('--zipf', type=float, default=1.1, help="Zipf exponent for title/location popularity")
+    parser.add_argument('--seed', type=int, default=None, help="random seed for reproducible output")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="rows generated per batch")
+    args = parser.parse_args()
+
+    options = dict(contents=args.contents, locations=args.locations, n_users=args.users,
+                   span=timedelta(hours=args.span_hours), zipf_a=args.zipf, seed=args.seed)
+    started = time.perf_counter()
+    if args.post:
+        rows, retries = post_events(args.post, args.rows, args.batch_size, **options)
+        elapsed = time.perf_counter() - started
+        print(f"Posted {rows:,} rows to {args.post} in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s, "
+              f"{retries} retries)")
+        return
+    rows = write_events(args.output, args.rows, chunk_size=args.chunk_size, **options)
+    elapsed = time.perf_counter() - started
+    print(f"Wrote {rows:,} rows to {args.output} in {elapsed:.1f}s ({rows / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Offline geocoding of location names against a bundled coordinates table"""
+import os
+import tempfile
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+from dataset_cache import DEFAULT_CACHE_DIR, content_key
+from gazetteer import LOCATION_TYPES, get_gazetteer, normalize_name
+
+DEFAULT_GEOCODES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'geocodes.csv')
+DEFAULT_GEOCODES_DIR = os.path.join(DEFAULT_CACHE_DIR, 'geocodes')
+
+GEOCODE_SCHEMA = pa.schema([
+    ('name', pa.string()),
+    ('kind', pa.string()),
+    # Two-letter state or ISO-3 country code used by choropleths; empty for cities
+    ('code', pa.string()),
+    ('lat', pa.float64()),
+    ('lon', pa.float64()),
+])
+
+
+def read_geocodes_csv(path):
+    """Parse a ``name,kind,code,lat,lon`` CSV into an Arrow table"""
+    return pa_csv.read_csv(path, convert_options=pa_csv.ConvertOptions(
+        column_types=GEOCODE_SCHEMA, strings_can_be_null=False))
+
+
+def compile_geocodes(path, directory=DEFAULT_GEOCODES_DIR):
+    """Arrow IPC copy of a geocoding CSV, written once per distinct CSV content"""
+    with open(path, 'rb') as file:
+        key = content_key(file.read(), 'geocodes')
+    compiled = os.path.join(directory, key + '.arrow')
+    if not os.path.exists(compiled):
+        os.makedirs(directory, exist_ok=True)
+        table = read_geocodes_csv(path).combine_chunks()
+        # Written under a temporary name so concurrent sessions never map a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+            os.replace(tmp_path, compiled)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+    return compiled
+
+
+class Geocoder:
+    """Coordinates for location names, resolved per distinct name
+
+    The bundled CSV is compiled once into an Arrow IPC file which every
+    process memory-maps, so the coordinate columns are shared pages of
+    that file rather than parsed copies. Names are matched exactly first
+    (normalized, for the detected location type, then the other types),
+    and otherwise through the gazetteer's aliases and substring matcher,
+    so "NYC" or "Dallas, TX" land on the right city.
+    """
+
+    def __init__(self, path=DEFAULT_GEOCODES_PATH, directory=DEFAULT_GEOCODES_DIR):
+        try:
+            self._source = pa.memory_map(compile_geocodes(path, directory), 'r')
+            table = pa.ipc.open_file(self._source).read_all()
+        except OSError:
+            # Read-only cache directory: fall back to an in-memory parse
+            self._source = None
+            table = read_geocodes_csv(path)
+        self.names = table.column('name').to_pylist()
+        self.codes = np.array([code or None for code in table.column('code').to_pylist()], dtype=object)
+        self.lat = table.column('lat').to_numpy()
+        self.lon = table.column('lon').to_numpy()
+        kinds = table.column('kind').to_pylist()
+        self._index = {kind: {} for kind in LOCATION_TYPES}
+        for row, (name, kind) in enumerate(zip(self.names, kinds)):
+            self._index[kind].setdefault(normalize_name(name), row)
+
+    def __len__(self):
+        return len(self.names)
+
+    def lookup(self, name, location_type):
+        """Table row for a location name, or -1 when it cannot be placed"""
+        gazetteer = get_gazetteer()
+        key = normalize_name(name)
+        kinds = [location_type] + [kind for kind in LOCATION_TYPES if kind != location_type]
+        for kind in kinds:
+            row = self._index[kind].get(key)
+            if row is not None:
+                return row
+        for kind in kinds:
+            entry = gazetteer.lookup(kind, name)
+            if entry != -1:
+                row = self._index[kind].get(normalize_name(gazetteer.entries[kind][entry]))
+                if row is not None:
+                    return row
+        return -1
+
+    def locate(self, locations, location_type):
+        """``code``, ``lat`` and ``lon`` for every value of a location column
+
+        Returns the coordinates frame (NaN where unresolved, aligned with
+        ``locations``) and the sorted list of names that could not be placed.
+        """
+        locations = pd.Series(locations, dtype='object').astype(str)
+        codes, uniques = pd.factorize(locations)
+        rows = np.fromiter((self.lookup(name, location_type) for name in uniques), dtype=np.int64,
+                           count=len(uniques))
+        found = rows >= 0
+        rows = np.where(found, rows, 0)[codes]
+        found = found[codes]
+        coordinates = pd.DataFrame({
+            'code': np.where(found, self.codes[rows], None),
+            'lat': np.where(found, self.lat[rows], np.nan),
+            'lon': np.where(found, self.lon[rows], np.nan),
+        }, index=locations.index)
+        return coordinates, sorted(set(locations[~found]))
+
+
+@lru_cache(maxsize=None)
+def get_geocoder(path=DEFAULT_GEOCODES_PATH):
+    """The process-wide geocoder for a coordinates table, loaded on first use"""
+    return Geocoder(path)
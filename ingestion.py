@@ -0,0 +1,427 @@
+"""Schema-typed ingestion helpers for OTT viewer activity files"""
+import operator
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+# Required columns for OTT analysis
+REQUIRED_COLUMNS = {
+    'content_id': ['content_id', 'content_title', 'show_name', 'title'],
+    'watch_time': ['watch_time', 'duration', 'watch_duration', 'viewing_time'],
+    'timestamp': ['timestamp', 'watch_timestamp', 'viewing_timestamp', 'date'],
+    'device_type': ['device_type', 'device', 'platform'],
+    'location': ['location', 'city', 'region', 'country'],
+    'is_completed': ['is_completed', 'completed', 'finished']
+}
+
+# Explicit schema used by the streaming reader
+CATEGORICAL_COLUMNS = ['content_id', 'device_type', 'location']
+WATCH_TIME_DTYPE = 'float32'
+# ISO 8601 covers "2024-04-01 10:00:00" and "2024-04-01T10:00:00" without per-row format inference
+TIMESTAMP_FORMAT = 'ISO8601'
+TRUE_VALUES = {'true', 't', 'yes', 'y', '1', '1.0'}
+
+DEFAULT_CHUNK_SIZE = 250_000
+# Bumped whenever normalization changes the frames it produces, so cached datasets are rebuilt
+SCHEMA_VERSION = 3
+
+# Extra text columns are dictionary-encoded when at most this share of their values is distinct
+CATEGORY_MAX_RATIO = 0.5
+# Bytes per row of a pointer or a 64-bit value in pandas' default column layout
+PLAIN_ITEM_BYTES = 8
+
+
+def validate_columns(df):
+    """Validate if the dataframe has the required columns"""
+    found_columns = {}
+    missing_columns = []
+
+    for required_col, alternatives in REQUIRED_COLUMNS.items():
+        found = False
+        for alt in alternatives:
+            if any(col.lower() == alt.lower() for col in df.columns):
+                found = True
+                # Store the actual column name that was found
+                found_columns[required_col] = next(col for col in df.columns if col.lower() == alt.lower())
+                break
+        if not found:
+            missing_columns.append(required_col)
+
+    return found_columns, missing_columns
+
+
+def normalize_dataset(df, found_columns):
+    """Rename columns to standard names and convert 'is_completed' to boolean"""
+    df = df.rename(columns={v: k for k, v in found_columns.items()})
+
+    # Handle different formats of boolean values
+    if df['is_completed'].dtype == 'object':
+        # Convert string TRUE/FALSE to boolean
+        df['is_completed'] = df['is_completed'].map({
+            'TRUE': True, 'True': True, 'true': True, '1': True, 1: True,
+            'FALSE': False, 'False': False, 'false': False, '0': False, 0: False
+        })
+    return df
+
+
+def analyze_dataset(df):
+    """Analyze the dataset and return a summary"""
+    num_rows = len(df)
+    num_cols = len(df.columns)
+    date_range = None
+    unparsed_timestamps = 0
+    if 'timestamp' in df.columns:
+        try:
+            df['timestamp'] = pd.to_datetime(df['timestamp'])
+            # Typed readers turn timestamps they cannot parse into NaT instead of failing the file
+            unparsed_timestamps = int(df['timestamp'].isna().sum())
+            date_range = f"{df['timestamp'].min().strftime('%Y-%m-%d')} to {df['timestamp'].max().strftime('%Y-%m-%d')}"
+        except:
+            date_range = "Unable to parse date range"
+
+    return {
+        'num_rows': num_rows,
+        'num_cols': num_cols,
+        'date_range': date_range,
+        'unparsed_timestamps': unparsed_timestamps
+    }
+
+
+def schema_dtypes(found_columns):
+    """Map the file's actual column names to the dtypes they are parsed with"""
+    dtypes = {found_columns[col]: 'category' for col in CATEGORICAL_COLUMNS}
+    dtypes[found_columns['watch_time']] = WATCH_TIME_DTYPE
+    # Booleans arrive as TRUE/true/1/yes..., so read them as a small categorical and decode once per chunk
+    dtypes[found_columns['is_completed']] = 'category'
+    dtypes[found_columns['timestamp']] = 'string'
+    return dtypes
+
+
+def parse_bool_column(values):
+    """Decode a categorical column of truthy/falsy strings into a bool array"""
+    values = values.astype('category')
+    truthy = values.cat.categories.astype(str).str.strip().str.lower().isin(TRUE_VALUES)
+    codes = values.cat.codes.to_numpy()
+    # Missing values (code -1) count as not completed
+    return np.where(codes >= 0, np.asarray(truthy)[codes], False)
+
+
+def parse_timestamps(values, timestamp_format=TIMESTAMP_FORMAT):
+    """Parse timestamps with ``timestamp_format``, falling back to per-value inference
+
+    Values that still cannot be parsed become NaT, so one odd row never
+    fails a whole upload; ``analyze_dataset`` reports how many there were.
+    """
+    try:
+        return pd.to_datetime(values, format=timestamp_format)
+    except (ValueError, TypeError):
+        return pd.to_datetime(values, format='mixed', errors='coerce')
+
+
+def normalize_chunk(chunk, found_columns, timestamp_format=TIMESTAMP_FORMAT):
+    """Rename a raw chunk to the standard column names and apply the typed schema"""
+    chunk = chunk.rename(columns={v: k for k, v in found_columns.items()})
+
+    typed = {}
+    if 'user_id' in chunk.columns:
+        typed['user_id'] = chunk['user_id']
+    for col in REQUIRED_COLUMNS:
+        if col in CATEGORICAL_COLUMNS:
+            typed[col] = chunk[col].astype('category')
+        elif col == 'watch_time':
+            typed[col] = chunk[col].astype(WATCH_TIME_DTYPE)
+        elif col == 'is_completed':
+            typed[col] = parse_bool_column(chunk[col])
+        else:
+            typed[col] = parse_timestamps(chunk[col], timestamp_format)
+    return pd.DataFrame(typed, index=chunk.index)
+
+
+def concat_chunks(chunks):
+    """Concatenate typed chunks, unioning categoricals so they stay dictionary-encoded"""
+    columns = list(chunks[0].columns)
+    categorical = [col for col in columns if isinstance(chunks[0][col].dtype, pd.CategoricalDtype)]
+    merged = {col: union_categoricals([chunk[col] for chunk in chunks]) for col in categorical}
+
+    df = pd.concat([chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True)
+    for col in categorical:
+        df[col] = merged[col]
+    return df[columns]
+
+
+def _fits(values, dtype):
+    """Whether numeric ``values`` can be stored as the narrower ``dtype`` without loss"""
+    if pd.api.types.is_float_dtype(dtype):
+        return pd.api.types.is_float_dtype(values.dtype)
+    if not (pd.api.types.is_integer_dtype(dtype) and pd.api.types.is_integer_dtype(values.dtype)):
+        return False
+    info = np.iinfo(dtype)
+    return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
+
+
+def conform_rows(history, delta):
+    """``delta`` restricted to the columns of ``history`` and cast to its compact dtypes where the values fit"""
+    delta = delta[[col for col in history.columns if col in delta.columns]]
+    dtypes = {}
+    for col in delta.columns:
+        dtype = history[col].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            dtypes[col] = 'category'
+        elif delta[col].dtype != dtype and _fits(delta[col], dtype):
+            dtypes[col] = dtype
+    if dtypes:
+        delta = delta.astype(dtypes)
+    return delta
+
+
+def combine_chunks(chunks):
+    """One frame from a loaded dataset followed by batches of new events"""
+    history = chunks[0]
+    if len(chunks) == 1:
+        return history
+    return concat_chunks([history] + [conform_rows(history, delta) for delta in chunks[1:]])
+
+
+def append_rows(history, delta):
+    """Append new events to the loaded data, keeping its compact dtypes where the new values fit"""
+    return combine_chunks([history, delta])
+
+
+# Pending batches a ChunkedFrame holds before it folds them into one frame on append
+MAX_PENDING_CHUNKS = 64
+
+
+class ChunkedFrame:
+    """A dataset plus the event batches appended to it, combined only on demand
+
+    ``append`` shares the existing chunks with the new instance, so it
+    costs time proportional to the batch rather than to the history.
+    ``frame()`` concatenates once and caches the result, and later appends
+    start from that frame. After ``MAX_PENDING_CHUNKS`` uncombined batches
+    the next append folds them in, which keeps the combine cost amortized
+    for sources nobody reads row by row.
+    """
+
+    def __init__(self, chunks):
+        self.chunks = tuple(chunks)
+        self.rows = sum(len(chunk) for chunk in self.chunks)
+        self._frame = self.chunks[0] if len(self.chunks) == 1 else None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def wrap(cls, data):
+        return data if isinstance(data, cls) else cls([data])
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, delta):
+        """A new ChunkedFrame with ``delta`` after these rows; this one is left unchanged"""
+        chunks = (self._frame,) if self._frame is not None else self.chunks
+        if len(chunks) > MAX_PENDING_CHUNKS:
+            chunks = (combine_chunks(chunks),)
+        return ChunkedFrame(chunks + (delta,))
+
+    def frame(self):
+        """All rows as a single DataFrame, combined on first use"""
+        with self._lock:
+            if self._frame is None:
+                self._frame = combine_chunks(self.chunks)
+            return self._frame
+
+
+def as_frame(data):
+    """The rows of a DataFrame or ChunkedFrame as one DataFrame"""
+    return data.frame() if isinstance(data, ChunkedFrame) else data
+
+
+def compact_dataset(df):
+    """Compact in-memory copy of a normalized dataset
+
+    Location, device and content labels (and other text columns with few
+    distinct values) are dictionary-encoded as categoricals, watch time is
+    stored as float32, integer columns are downcast to the smallest type
+    holding their range and ``is_completed`` becomes a one-byte bool.
+    Columns that already have their compact dtype are left untouched, so
+    frames from the streaming readers pass through almost for free.
+    """
+    compact = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            pass
+        elif col == 'is_completed':
+            if values.dtype != 'bool':
+                values = pd.Series(parse_bool_column(values), index=values.index)
+        elif col == 'watch_time':
+            values = pd.to_numeric(values).astype(WATCH_TIME_DTYPE)
+        elif col == 'timestamp':
+            if not pd.api.types.is_datetime64_any_dtype(values.dtype):
+                values = parse_timestamps(values)
+        elif col in CATEGORICAL_COLUMNS:
+            values = values.astype('category')
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            values = pd.to_numeric(values, downcast='unsigned' if len(values) and values.min() >= 0 else 'integer')
+        elif values.dtype == 'object' and values.nunique() <= CATEGORY_MAX_RATIO * len(values):
+            values = values.astype('category')
+        compact[col] = values
+    return pd.DataFrame(compact, index=df.index)
+
+
+def plain_memory_usage(df):
+    """Bytes per column if ``df`` were held with pandas' default dtypes
+
+    Categoricals are costed as one Python string object per row and
+    numbers and timestamps as 64 bits; other columns are measured as they
+    are. This is the "before" side of the memory footprint panel.
+    """
+    usage = {}
+    for col in df.columns:
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            categories = values.cat.categories
+            codes = values.cat.codes.to_numpy()
+            sizes = np.fromiter((sys.getsizeof(str(category)) for category in categories), dtype=np.int64,
+                                count=len(categories))
+            counts = np.bincount(codes[codes >= 0], minlength=len(categories))
+            missing = len(codes) - int(counts.sum())
+            usage[col] = PLAIN_ITEM_BYTES * len(values) + int(sizes @ counts) + missing * sys.getsizeof(np.nan)
+        elif values.dtype != 'bool' and (pd.api.types.is_numeric_dtype(values.dtype)
+                                         or pd.api.types.is_datetime64_any_dtype(values.dtype)):
+            usage[col] = PLAIN_ITEM_BYTES * len(values)
+        else:
+            usage[col] = int(values.memory_usage(deep=True, index=False))
+    return pd.Series(usage, dtype='int64')
+
+
+def memory_footprint(df):
+    """Per-column bytes of ``df`` against the plain pandas layout, with a total row"""
+    footprint = pd.DataFrame({
+        'dtype': df.dtypes.astype(str),
+        'plain_bytes': plain_memory_usage(df),
+        'compact_bytes': df.memory_usage(deep=True, index=False).astype('int64'),
+    })
+    footprint.loc['total'] = ['', footprint['plain_bytes'].sum(), footprint['compact_bytes'].sum()]
+    footprint['saved'] = 1 - footprint['compact_bytes'] / footprint['plain_bytes'].where(footprint['plain_bytes'] > 0)
+    return footprint
+
+
+def _stream_size(file):
+    """Total size in bytes of a seekable file object"""
+    position = file.tell()
+    file.seek(0, os.SEEK_END)
+    size = file.tell()
+    file.seek(position)
+    return size
+
+
+def read_csv_chunked(source, chunk_size=DEFAULT_CHUNK_SIZE, timestamp_format=TIMESTAMP_FORMAT, on_progress=None):
+    """Read a CSV in fixed-size chunks with an explicit dtype schema
+
+    Each chunk is renamed and typed as soon as it is parsed, so only compact
+    typed chunks are held in memory. ``on_progress(fraction, rows)`` is called
+    after every chunk. Files missing required columns are returned as their
+    empty header frame so callers can report them through ``validate_columns``.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as file:
+            return read_csv_chunked(file, chunk_size, timestamp_format, on_progress)
+
+    header = pd.read_csv(source, nrows=0)
+    found_columns, missing_columns = validate_columns(header)
+    if missing_columns:
+        return header
+
+    source.seek(0)
+    total_size = _stream_size(source) or 1
+    usecols = list(found_columns.values())
+    user_id_col = next((col for col in header.columns if col.lower() == 'user_id'), None)
+    if user_id_col is not None:
+        usecols.append(user_id_col)
+        found_columns = {**found_columns, 'user_id': user_id_col}
+
+    chunks = []
+    rows = 0
+    with pd.read_csv(source, usecols=usecols, dtype=schema_dtypes(found_columns), chunksize=chunk_size) as reader:
+        for chunk in reader:
+            chunks.append(normalize_chunk(chunk, found_columns, timestamp_format))
+            rows += len(chunk)
+            if on_progress is not None:
+                on_progress(min(source.tell() / total_size, 1.0), rows)
+
+    if not chunks:
+        return normalize_chunk(header.reindex(columns=usecols).astype(schema_dtypes(found_columns)),
+                               found_columns, timestamp_format)
+    return concat_chunks(chunks)
+
+
+def excel_sheet_names(source):
+    """Worksheet names of an .xlsx workbook, in workbook order"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def read_excel_streaming(source, sheet_name=None, chunk_size=DEFAULT_CHUNK_SIZE, timestamp_format=TIMESTAMP_FORMAT,
+                         on_progress=None):
+    """Read one worksheet of an .xlsx workbook row by row into the typed schema
+
+    The workbook is opened in openpyxl's read-only mode, which parses the
+    sheet XML as it is iterated instead of loading every cell object, and
+    rows are typed in batches of ``chunk_size`` exactly like
+    ``read_csv_chunked``. ``sheet_name`` defaults to the active sheet.
+    ``on_progress(fraction, rows)`` is called after every batch. Sheets
+    missing required columns are returned as their empty header frame.
+    """
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True, data_only=True)
+    try:
+        sheet = workbook[sheet_name] if sheet_name is not None else workbook.active
+        rows = sheet.iter_rows(values_only=True)
+        header = [str(name) if name is not None else '' for name in next(rows, ())]
+        header_frame = pd.DataFrame(columns=header)
+        found_columns, missing_columns = validate_columns(header_frame)
+        if missing_columns:
+            return header_frame
+
+        user_id_col = next((col for col in header if col.lower() == 'user_id'), None)
+        if user_id_col is not None:
+            found_columns = {**found_columns, 'user_id': user_id_col}
+        usecols = list(found_columns.values())
+        positions = [header.index(col) for col in usecols]
+        # The sheet dimension is only a hint in read-only mode (some writers omit it)
+        total_rows = max((sheet.max_row or 0) - 1, 1)
+
+        chunks = []
+        batch = []
+        read = 0
+        pick = operator.itemgetter(*positions)
+        for row in rows:
+            try:
+                batch.append(pick(row))
+            except IndexError:
+                # Read-only rows stop at the last non-empty cell
+                batch.append(tuple(row[position] if position < len(row) else None for position in positions))
+            if len(batch) == chunk_size:
+                chunks.append(normalize_chunk(pd.DataFrame(batch, columns=usecols), found_columns, timestamp_format))
+                read += len(batch)
+                batch = []
+                if on_progress is not None:
+                    on_progress(min(read / total_rows, 1.0), read)
+        if batch or not chunks:
+            chunks.append(normalize_chunk(pd.DataFrame(batch, columns=usecols), found_columns, timestamp_format))
+            read += len(batch)
+            if on_progress is not None:
+                on_progress(1.0, read)
+    finally:
+        workbook.close()
+    return concat_chunks(chunks)
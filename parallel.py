@@ -0,0 +1,67 @@
+"""Map-reduce aggregation of a dataset across a process pool
+
+The dataset is split into row partitions, each worker builds mergeable
+partial aggregates (counts, sums, per-key counters and distinct-viewer sets)
+for its partition, and the parent merges them into one RunningAggregates.
+In approximate mode the distinct-viewer sets are HyperLogLog sketches, so
+partials stay a few KiB regardless of the number of viewers.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from aggregates import RunningAggregates
+
+# Below this size the cost of shipping partitions to workers outweighs the speed-up
+DEFAULT_MIN_PARALLEL_ROWS = 500_000
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def get_pool(workers):
+    """Process pool with ``workers`` processes, created once and reused"""
+    with _pools_lock:
+        if workers not in _pools:
+            # Spawn rather than fork: the Streamlit server is multi-threaded
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers,
+                                                  mp_context=multiprocessing.get_context('spawn'))
+        return _pools[workers]
+
+
+def partitions(df, count):
+    """Split a DataFrame into ``count`` contiguous row partitions"""
+    bounds = np.linspace(0, len(df), count + 1, dtype=np.int64)
+    return [df.iloc[start:stop] for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+
+
+def partial_aggregates(partition, options):
+    """Map step: mergeable aggregates for one partition"""
+    return RunningAggregates.from_frame(partition, **options)
+
+
+def parallel_aggregate(df, workers=None, min_rows=DEFAULT_MIN_PARALLEL_ROWS, **options):
+    """Build RunningAggregates for ``df``, fanning out across ``workers`` processes
+
+    ``options`` are passed to RunningAggregates (e.g. ``approx_viewers``).
+    Small inputs, or ``workers <= 1``, fall back to a sequential pass.
+    """
+    workers = workers or default_workers()
+    if workers <= 1 or len(df) < min_rows:
+        return RunningAggregates.from_frame(df, **options)
+
+    parts = partitions(df, workers)
+    results = get_pool(workers).map(partial_aggregates, parts, [options] * len(parts))
+
+    # Reduce step: merge the partials in the parent process
+    running = RunningAggregates(**options)
+    for partial in results:
+        running.merge(partial)
+    return running
@@ -0,0 +1,138 @@
+"""PDF report generation for the OTT analytics dashboard"""
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import plotly.io as pio
+from fpdf import FPDF
+
+from figures import content_pie, device_pie, dropoff_chart, location_map, region_bar
+from parallel import default_workers, get_pool
+
+# Size of each chart image in the report, in CSS pixels before scaling
+CHART_WIDTH = 900
+CHART_HEIGHT = 500
+CHART_SCALE = 2
+DEFAULT_CHART_WORKERS = min(4, default_workers())
+# Width of an embedded chart on the A4 page, in millimetres
+CHART_PAGE_WIDTH = 180
+
+_builder = None
+_builder_lock = threading.Lock()
+
+
+def render_chart(figure_json, width=CHART_WIDTH, height=CHART_HEIGHT, scale=CHART_SCALE):
+    """PNG bytes of a Plotly figure given as JSON, restyled for a white page
+
+    Runs in a pool worker: each worker process keeps its own kaleido
+    renderer alive, so only the first chart it draws pays the start-up.
+    Returns the error message instead when kaleido cannot draw the chart
+    (e.g. maps need the topojson files from the Plotly CDN).
+    """
+    fig = pio.from_json(figure_json)
+    fig.update_layout(paper_bgcolor='white', plot_bgcolor='white', font=dict(color='black'))
+    try:
+        return pio.to_image(fig, format='png', width=width, height=height, scale=scale, engine='kaleido')
+    except ValueError as e:
+        return str(e)
+
+
+def dashboard_figures(dashboard, scope='world', map_viz_type='Bubble Map'):
+    """The dashboard's charts as ``{title: figure}``, in report order"""
+    geography = dashboard.geography
+    return {
+        "Active Viewers by Content": content_pie(dashboard.content.counts),
+        "Device Usage": device_pie(dashboard.devices.counts),
+        "Viewer Drop-off": dropoff_chart(dashboard.dropoff.counts, dashboard.dropoff.edges, dashboard.dropoff.buckets),
+        "Geographical Viewership": location_map(geography.locations, geography.location_type, None, scope, map_viz_type),
+        dashboard.regions.title: region_bar(dashboard.regions.regions, dashboard.regions.title),
+    }
+
+
+def chart_images(figures, workers=DEFAULT_CHART_WORKERS):
+    """Render ``{title: figure}`` to ``{title: PNG bytes or error message}``, in parallel across the pool"""
+    titles = list(figures)
+    payloads = [figures[title].to_json() for title in titles]
+    if workers <= 1 or len(payloads) <= 1:
+        images = [render_chart(payload) for payload in payloads]
+    else:
+        images = get_pool(workers).map(render_chart, payloads)
+    return dict(zip(titles, images))
+
+
+def build_pdf_report(dashboard, images=None):
+    """Build the summary PDF report from computed dashboard sections and return its bytes
+
+    ``images`` maps chart titles to PNG bytes (see ``chart_images``); each
+    is embedded full width after the metrics, and charts that could not be
+    rendered are listed with their error instead.
+    """
+    pdf = FPDF()
+    pdf.add_page()
+    pdf.set_font('Arial', 'B', 16)
+    pdf.cell(0, 10, 'OTT Analytics Dashboard Report', ln=True, align='C')
+    pdf.set_font('Arial', '', 12)
+
+    # Add timestamp
+    pdf.cell(0, 10, f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}', ln=True)
+
+    # Add summary statistics
+    pdf.ln(10)
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'Key Metrics', ln=True)
+    pdf.set_font('Arial', '', 12)
+
+    kpis = dashboard.kpis
+    approx = '~' if kpis.viewers_error else ''
+    pdf.cell(0, 10, f'Total Viewers: {approx}{kpis.total_viewers:,}', ln=True)
+    pdf.cell(0, 10, f'Average Watch Time: {kpis.avg_watch_time:.1f} minutes', ln=True)
+    pdf.cell(0, 10, f'Completion Rate: {kpis.completion_rate:.1f}%', ln=True)
+
+    # Add information about top content
+    top_content = dashboard.content.counts.nlargest(3)
+    pdf.ln(10)
+    pdf.set_font('Arial', 'B', 14)
+    pdf.cell(0, 10, 'Top Content', ln=True)
+    pdf.set_font('Arial', '', 12)
+
+    for content, count in top_content.items():
+        pdf.cell(0, 10, f'{content}: {count} viewers', ln=True)
+
+    if images:
+        # FPDF 1.7 embeds images from files only (read as soon as they are placed)
+        with tempfile.TemporaryDirectory() as directory:
+            for index, (title, image) in enumerate(images.items()):
+                pdf.add_page()
+                pdf.set_font('Arial', 'B', 14)
+                pdf.cell(0, 10, title, ln=True)
+                if isinstance(image, str):
+                    pdf.set_font('Arial', '', 10)
+                    pdf.multi_cell(0, 6, f'Chart could not be rendered: {image}'.encode('latin-1', 'replace').decode('latin-1'))
+                    continue
+                path = os.path.join(directory, f'chart_{index}.png')
+                with open(path, 'wb') as file:
+                    file.write(image)
+                pdf.image(path, w=CHART_PAGE_WIDTH)
+
+    # Save to bytes for download
+    return pdf.output(dest='S').encode('latin-1')
+
+
+def build_chart_report(dashboard, figures, workers=DEFAULT_CHART_WORKERS):
+    """PDF report with ``{title: figure}`` rendered in parallel and embedded"""
+    return build_pdf_report(dashboard, chart_images(figures, workers))
+
+
+def submit_report(dashboard, figures, workers=DEFAULT_CHART_WORKERS):
+    """Start building a chart report in the background and return its Future
+
+    Reports are built one at a time on a process-wide thread, so a UI
+    session only polls the Future and never waits for kaleido or FPDF.
+    """
+    global _builder
+    with _builder_lock:
+        if _builder is None:
+            _builder = ThreadPoolExecutor(max_workers=1, thread_name_prefix='report-builder')
+    return _builder.submit(build_chart_report, dashboard, figures, workers)
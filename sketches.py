@@ -0,0 +1,229 @@
+"""Mergeable probabilistic sketches for streaming dashboard metrics"""
+import numpy as np
+import pandas as pd
+
+DEFAULT_HLL_PRECISION = 14
+
+
+def hash_values(values):
+    """64-bit hashes of a column of ids (ints, strings or categoricals)"""
+    return pd.util.hash_pandas_object(pd.Series(values), index=False).to_numpy()
+
+
+def leading_zeros(words):
+    """Count leading zero bits of each uint64 (words must be non-zero)"""
+    words = words.copy()
+    zeros = np.zeros(len(words), dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        empty = words < np.uint64(1 << (64 - shift))
+        zeros[empty] += shift
+        words[empty] <<= np.uint64(shift)
+    return zeros
+
+
+class HyperLogLog:
+    """HyperLogLog distinct-count sketch with ``2 ** precision`` registers
+
+    Memory is one byte per register regardless of how many values are
+    added, and two sketches with the same precision merge by taking the
+    register-wise maximum, so partitions, refreshes and time buckets can be
+    combined freely.
+    """
+
+    def __init__(self, precision=DEFAULT_HLL_PRECISION):
+        if not 4 <= precision <= 18:
+            raise ValueError("HyperLogLog precision must be between 4 and 18")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    @property
+    def relative_error(self):
+        """Standard error of the estimate relative to the true count"""
+        return 1.04 / np.sqrt(len(self.registers))
+
+    def update(self, values):
+        """Add a batch of values"""
+        if len(values):
+            self.update_hashes(hash_values(values))
+        return self
+
+    def update_hashes(self, hashes):
+        """Add a batch of precomputed 64-bit hashes"""
+        p = np.uint64(self.precision)
+        index = (hashes >> (np.uint64(64) - p)).astype(np.intp)
+        # A sentinel bit below the shifted hash caps the rank at 64 - p + 1
+        remainder = (hashes << p) | (np.uint64(1) << (p - np.uint64(1)))
+        np.maximum.at(self.registers, index, leading_zeros(remainder) + 1)
+        return self
+
+    def merge(self, other):
+        """Fold in a sketch built over other values"""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precisions")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def copy(self):
+        sketch = HyperLogLog(self.precision)
+        sketch.registers[:] = self.registers
+        return sketch
+
+    def count(self):
+        """Estimated number of distinct values"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        empty = int(np.count_nonzero(self.registers == 0))
+        # Linear counting is more accurate while many registers are still empty
+        if estimate <= 2.5 * m and empty:
+            estimate = m * np.log(m / empty)
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
+
+
+DEFAULT_COMPRESSION = 200
+# Values are folded into the digest in blocks of this many, so no full column is ever sorted
+TDIGEST_BLOCK_SIZE = 100_000
+
+
+class TDigest:
+    """Merging t-digest for streaming quantiles in constant memory
+
+    Values are kept as at most about ``compression`` weighted centroids,
+    sized by the arcsine scale function so the tails stay precise. Each
+    compression pass is a single vectorized sort and ``bincount``, and two
+    digests merge by compressing their centroids together.
+    """
+
+    def __init__(self, compression=DEFAULT_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    @property
+    def total(self):
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """Add a batch of values (NaNs are ignored)"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        for start in range(0, len(values), TDIGEST_BLOCK_SIZE):
+            block = values[start:start + TDIGEST_BLOCK_SIZE]
+            self._compress(np.concatenate([self.means, block]),
+                           np.concatenate([self.weights, np.ones(len(block))]))
+        return self
+
+    def merge(self, other):
+        """Fold in a digest built over other values"""
+        if len(other.means):
+            self._compress(np.concatenate([self.means, other.means]),
+                           np.concatenate([self.weights, other.weights]))
+        return self
+
+    def _compress(self, means, weights):
+        if not len(means):
+            return
+        order = np.argsort(means, kind='stable')
+        means, weights = means[order], weights[order]
+        self.min = min(self.min, means[0])
+        self.max = max(self.max, means[-1])
+
+        # Cluster index from the k1 scale function at each point's cumulative position
+        total = weights.sum()
+        position = (np.cumsum(weights) - weights / 2) / total
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * position - 1)
+        cluster = np.floor(k - k[0]).astype(np.intp)
+
+        merged_weights = np.bincount(cluster, weights=weights)
+        merged_means = np.bincount(cluster, weights=weights * means)
+        keep = merged_weights > 0
+        self.weights = merged_weights[keep]
+        self.means = merged_means[keep] / self.weights
+
+    def _knots(self):
+        """Cumulative fractions at each centroid, anchored at the observed min and max"""
+        cumulative = (np.cumsum(self.weights) - self.weights / 2) / self.total
+        return (np.concatenate([[self.min], self.means, [self.max]]),
+                np.concatenate([[0.0], cumulative, [1.0]]))
+
+    def quantile(self, q):
+        """Estimated value(s) at quantile(s) ``q`` in [0, 1]"""
+        values, fractions = self._knots()
+        return np.interp(q, fractions, values)
+
+    def cdf(self, x):
+        """Estimated fraction of values at or below ``x``"""
+        values, fractions = self._knots()
+        return np.interp(x, values, fractions)
+
+
+DEFAULT_TOP_K_CAPACITY = 1000
+
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter summary over at most ``capacity`` keys
+
+    Each monitored key keeps an upper-bound ``count`` and the ``error`` by
+    which it may overestimate the true count; any key seen more than
+    ``total / capacity`` times is guaranteed to be monitored. Extra per-key
+    sums (e.g. watch time) are accumulated while a key is monitored.
+
+    Batches are summarized exactly with one group-by and then merged, so an
+    update is a handful of vectorized operations rather than a per-event
+    loop, and two summaries merge the same way.
+    """
+
+    def __init__(self, capacity=DEFAULT_TOP_K_CAPACITY, columns=()):
+        self.capacity = capacity
+        self.total = 0
+        self.table = pd.DataFrame({name: pd.Series(dtype='float64')
+                                   for name in ['count', 'error', *columns]})
+
+    @property
+    def floor(self):
+        """Upper bound on the count of any key that is not monitored"""
+        return self.table['count'].min() if len(self.table) >= self.capacity else 0.0
+
+    @property
+    def max_error(self):
+        """Largest possible overestimate of any monitored count"""
+        return float(self.table['error'].max()) if len(self.table) else 0.0
+
+    def update(self, keys, **sums):
+        """Add a batch of keys, with optional per-row values summed per key"""
+        if len(keys) == 0:
+            return self
+        frame = pd.DataFrame({name: np.asarray(values, dtype=np.float64) for name, values in sums.items()},
+                             index=pd.RangeIndex(len(keys)))
+        grouped = frame.groupby(np.asarray(keys))
+        batch = grouped.sum()
+        batch.insert(0, 'count', grouped.size().astype('float64'))
+        batch.insert(1, 'error', 0.0)
+        return self._combine(batch, 0.0, len(keys))
+
+    def merge(self, other):
+        """Fold in a summary built over other events"""
+        return self._combine(other.table, other.floor, other.total)
+
+    def _combine(self, table, floor, total):
+        # A key missing from one side may have been seen up to that side's floor times there
+        keys = self.table.index.union(table.index)
+        ours = self.table.reindex(keys)
+        theirs = table.reindex(keys, columns=self.table.columns)
+        for side, side_floor in ((ours, self.floor), (theirs, floor)):
+            missing = side['count'].isna()
+            side.loc[missing, ['count', 'error']] = side_floor
+        combined = ours.fillna(0.0) + theirs.fillna(0.0)
+        self.table = combined.nlargest(self.capacity, 'count', keep='first')
+        self.total += total
+        return self
+
+    def top(self, n=None):
+        """Monitored keys with their counts and error bounds, most frequent first"""
+        table = self.table.sort_values('count', ascending=False, kind='stable')
+        return table if n is None else table.head(n)
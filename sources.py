@@ -0,0 +1,346 @@
+"""Live event sources that feed newly arrived rows into the dashboard"""
+import asyncio
+import collections
+import hashlib
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+from dataset_cache import DEFAULT_CACHE_DIR
+from ingestion import concat_chunks, normalize_chunk, validate_columns
+
+DEFAULT_OFFSET_DIR = os.path.join(DEFAULT_CACHE_DIR, 'offsets')
+# Upper bound on the bytes parsed per read, so one refresh never stalls on a huge backlog
+DEFAULT_MAX_BATCH_BYTES = 64 * 1024 ** 2
+
+
+def normalize_events(raw):
+    """Validate a batch of raw events and apply the typed schema"""
+    found_columns, missing_columns = validate_columns(raw)
+    if missing_columns:
+        raise ValueError(f"Missing required columns: {', '.join(missing_columns)}")
+    user_id_col = next((col for col in raw.columns if col.lower() == 'user_id'), None)
+    if user_id_col is not None:
+        found_columns = {**found_columns, 'user_id': user_id_col}
+    return normalize_chunk(raw, found_columns)
+
+
+class FileTailSource:
+    """Follows a growing CSV or JSONL event file, returning only newly appended rows
+
+    The byte offset of the last complete line consumed is persisted next to
+    the file's identity (device, inode) so a restarted dashboard resumes
+    where it stopped. A different inode at the path means the file was
+    rotated and a size below the offset means it was truncated; either way
+    reading restarts from the beginning of the current file. A trailing
+    line without a newline is left for the next read. Lines that cannot be
+    parsed or typed are skipped and counted, so the offset always moves on.
+    """
+
+    def __init__(self, path, state_dir=DEFAULT_OFFSET_DIR, max_batch_bytes=DEFAULT_MAX_BATCH_BYTES):
+        self.path = os.path.abspath(path)
+        self.format = 'jsonl' if self.path.endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+        self.max_batch_bytes = max_batch_bytes
+        os.makedirs(state_dir, exist_ok=True)
+        self.state_path = os.path.join(state_dir, hashlib.sha1(self.path.encode()).hexdigest() + '.json')
+        self.state = self._load_state()
+        self.rotations = 0
+        self.truncations = 0
+        self.skipped_lines = 0
+        self.last_skip_error = None
+
+    def _load_state(self):
+        try:
+            with open(self.state_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {'path': self.path, 'identity': None, 'offset': 0, 'header': None}
+
+    def _save_state(self):
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.state_path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(self.state, file)
+        os.replace(tmp_path, self.state_path)
+
+    @property
+    def offset(self):
+        return self.state['offset']
+
+    def reset(self):
+        """Forget the persisted position and start again from the top of the file"""
+        self.state.update(identity=None, offset=0, header=None)
+        self._save_state()
+
+    def read(self):
+        """Parse the complete lines appended since the last read into typed rows
+
+        Returns an empty DataFrame when nothing new has arrived (or the file
+        does not exist yet).
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return pd.DataFrame()
+        identity = [stat.st_dev, stat.st_ino]
+        if self.state['identity'] != identity:
+            if self.state['identity'] is not None:
+                self.rotations += 1
+            self.state.update(identity=identity, offset=0, header=None)
+        elif stat.st_size < self.state['offset']:
+            self.truncations += 1
+            self.state.update(offset=0, header=None)
+
+        with open(self.path, 'rb') as file:
+            if self.format == 'csv' and self.state['header'] is None:
+                header = file.readline()
+                if not header.endswith(b'\n'):
+                    return pd.DataFrame()
+                self.state.update(header=header.decode(), offset=len(header))
+            file.seek(self.state['offset'])
+            data = file.read(self.max_batch_bytes)
+
+        # Only whole lines are consumed; a partially written last line waits for the next read
+        end = data.rfind(b'\n') + 1
+        if end == 0:
+            self._save_state()
+            return pd.DataFrame()
+        batches = self._parse_valid(data[:end])
+        self.state['offset'] += end
+        self._save_state()
+        if not batches:
+            return pd.DataFrame()
+        return batches[0] if len(batches) == 1 else concat_chunks(batches)
+
+    def read_to_end(self):
+        """Like ``read``, but keeps reading batches until every complete line has been consumed"""
+        batches = []
+        while True:
+            offset = self.offset
+            batch = self.read()
+            if len(batch):
+                batches.append(batch)
+            if self.offset == offset:
+                break
+        if not batches:
+            return pd.DataFrame()
+        return batches[0] if len(batches) == 1 else concat_chunks(batches)
+
+    @property
+    def pending_bytes(self):
+        """Bytes in the file beyond the saved offset, not yet read"""
+        try:
+            return max(os.stat(self.path).st_size - self.offset, 0)
+        except FileNotFoundError:
+            return 0
+
+    def _parse_valid(self, data):
+        """Typed batches for ``data``, skipping the lines that fail to parse
+
+        A failing block is split in halves until the bad lines are isolated,
+        so a single bad line costs a logarithmic number of re-parses.
+        """
+        try:
+            return [self._parse(data)]
+        except (ValueError, TypeError) as e:
+            lines = data.splitlines(keepends=True)
+            if len(lines) <= 1:
+                self.skipped_lines += len(lines)
+                self.last_skip_error = str(e)
+                return []
+            middle = len(lines) // 2
+            return self._parse_valid(b''.join(lines[:middle])) + self._parse_valid(b''.join(lines[middle:]))
+
+    def _parse(self, data):
+        if self.format == 'csv':
+            raw = pd.read_csv(io.BytesIO(self.state['header'].encode() + data))
+        else:
+            # Types are applied by normalize_chunk, not guessed by the JSON reader
+            raw = pd.read_json(io.BytesIO(data), lines=True, dtype=False, convert_dates=False)
+        return normalize_events(raw)
+
+
+DEFAULT_LISTEN_HOST = '127.0.0.1'
+DEFAULT_LISTEN_PORT = 8765
+DEFAULT_QUEUE_BATCHES = 256
+# How long a client waits for queue space before being told to retry
+DEFAULT_PUT_TIMEOUT = 5.0
+THROUGHPUT_WINDOW_SECONDS = 10.0
+MAX_BODY_BYTES = 64 * 1024 ** 2
+
+
+def parse_event_body(body):
+    """Typed rows from a POSTed JSON array of events or JSON-lines body"""
+    text = body.decode('utf-8').strip()
+    if not text:
+        return pd.DataFrame()
+    if text.startswith('['):
+        raw = pd.DataFrame(json.loads(text))
+    else:
+        raw = pd.read_json(io.StringIO(text), lines=True, dtype=False, convert_dates=False)
+    return normalize_events(raw)
+
+
+class EventListener:
+    """Localhost HTTP endpoint that buffers pushed event batches for the dashboard
+
+    ``POST /events`` accepts a JSON array or JSON lines matching the
+    ``REQUIRED_COLUMNS`` schema; ``GET /stats`` reports the counters below.
+    Parsed batches go into a bounded queue. When it is full the request
+    waits for space, which slows senders down, and after ``put_timeout``
+    seconds it is answered with 503 so the client retries later. The
+    server runs on its own asyncio loop in a daemon thread, and the
+    dashboard takes everything queued so far as one micro-batch with
+    ``drain``.
+    """
+
+    def __init__(self, host=DEFAULT_LISTEN_HOST, port=DEFAULT_LISTEN_PORT,
+                 max_batches=DEFAULT_QUEUE_BATCHES, put_timeout=DEFAULT_PUT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.max_batches = max_batches
+        self.put_timeout = put_timeout
+        self.rows_received = 0
+        self.rows_delivered = 0
+        self.batches_rejected = 0
+        # (time, rows) of recent batches; appended on the loop thread, read by stats()
+        self._arrivals = collections.deque()
+        self._arrivals_lock = threading.Lock()
+        self._loop = None
+        self._queue = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Bind the socket and serve in a background thread; bind errors are raised here"""
+        started = threading.Event()
+        errors = []
+
+        def serve():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._queue = asyncio.Queue(self.max_batches)
+            try:
+                self._server = self._loop.run_until_complete(
+                    asyncio.start_server(self._handle, self.host, self.port))
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                return
+            # Port 0 picks a free port
+            self.port = self._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+            self._server.close()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=serve, name='event-listener', daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._loop.is_running():
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            method, target, _ = request_line.decode('latin-1').split(' ', 2)
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                if name.strip().lower() == 'content-length':
+                    length = int(value)
+
+            if method == 'GET' and target == '/stats':
+                await self._respond(writer, 200, self.stats())
+            elif method != 'POST' or target != '/events':
+                await self._respond(writer, 404, {'error': 'POST events to /events'})
+            elif length > MAX_BODY_BYTES:
+                await self._respond(writer, 413, {'error': f'Batches are limited to {MAX_BODY_BYTES} bytes'})
+            else:
+                await self._accept(writer, await reader.readexactly(length))
+        except (ValueError, asyncio.IncompleteReadError) as e:
+            await self._respond(writer, 400, {'error': str(e)})
+        finally:
+            writer.close()
+
+    async def _accept(self, writer, body):
+        try:
+            batch = parse_event_body(body)
+        except (ValueError, KeyError, TypeError) as e:
+            await self._respond(writer, 400, {'error': str(e)})
+            return
+        try:
+            await asyncio.wait_for(self._queue.put(batch), self.put_timeout)
+        except asyncio.TimeoutError:
+            self.batches_rejected += 1
+            await self._respond(writer, 503, {'error': 'Queue full, retry later'}, {'Retry-After': '1'})
+            return
+        self.rows_received += len(batch)
+        with self._arrivals_lock:
+            self._arrivals.append((time.monotonic(), len(batch)))
+        await self._respond(writer, 202, {'accepted': len(batch), 'queue_depth': self._queue.qsize()})
+
+    @staticmethod
+    async def _respond(writer, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        reason = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+                  413: 'Payload Too Large', 503: 'Service Unavailable'}[status]
+        head = [f'HTTP/1.1 {status} {reason}', 'Content-Type: application/json',
+                f'Content-Length: {len(body)}', 'Connection: close']
+        head += [f'{name}: {value}' for name, value in (headers or {}).items()]
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+
+    async def _drain(self, max_rows):
+        batches, rows = [], 0
+        while not self._queue.empty() and (max_rows is None or rows < max_rows):
+            batch = self._queue.get_nowait()
+            if len(batch):
+                batches.append(batch)
+                rows += len(batch)
+        return batches
+
+    def drain(self, max_rows=None):
+        """Take the queued batches (up to about ``max_rows`` rows) as one typed DataFrame"""
+        if not self.running:
+            return pd.DataFrame()
+        batches = asyncio.run_coroutine_threadsafe(self._drain(max_rows), self._loop).result()
+        if not batches:
+            return pd.DataFrame()
+        events = concat_chunks(batches)
+        self.rows_delivered += len(events)
+        return events
+
+    def stats(self):
+        """Ingest throughput over the last few seconds and current queue depth"""
+        now = time.monotonic()
+        with self._arrivals_lock:
+            while self._arrivals and self._arrivals[0][0] < now - THROUGHPUT_WINDOW_SECONDS:
+                self._arrivals.popleft()
+            recent_rows = sum(rows for _, rows in self._arrivals)
+        return {
+            'rows_received': self.rows_received,
+            'rows_delivered': self.rows_delivered,
+            'batches_rejected': self.batches_rejected,
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'queue_capacity': self.max_batches,
+            'rows_per_second': recent_rows / THROUGHPUT_WINDOW_SECONDS,
+        }
@@ -0,0 +1,24 @@
+import os
+
+from batch_report import report_dataset, report_dirname
+
+
+def test_report_folders_are_unique_per_path(tmp_path):
+    names = {report_dirname(str(tmp_path / 'a' / 'events.csv')), report_dirname(str(tmp_path / 'b' / 'events.csv')),
+             report_dirname(str(tmp_path / 'a' / 'events.xlsx'))}
+    assert len(names) == 3
+    assert all(name.startswith('events.') for name in names)
+
+
+def test_same_named_datasets_do_not_share_a_folder(tmp_path):
+    source = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'valid_ott_dataset.csv')
+    outputs = []
+    for folder in ['a', 'b']:
+        os.makedirs(tmp_path / folder)
+        path = tmp_path / folder / 'events.csv'
+        path.write_bytes(open(source, 'rb').read())
+        summary = report_dataset(str(path), str(tmp_path / 'out'), formats=['csv'])
+        assert summary['error'] == ''
+        outputs.append(summary['output'])
+    assert outputs[0] != outputs[1]
+    assert all(os.path.exists(os.path.join(output, 'kpis.csv')) for output in outputs)
@@ -0,0 +1,64 @@
+import os
+
+import pandas as pd
+import pytest
+
+from dataset_cache import DatasetCache, content_key
+from generator import generate_events
+
+
+@pytest.fixture
+def events():
+    return generate_events(500, contents=20, seed=1)
+
+
+def test_round_trip_keeps_values_and_categoricals(tmp_path, events):
+    events = events.astype({'content_id': 'category', 'device_type': 'category'})
+    cache = DatasetCache(str(tmp_path))
+    assert cache.put('key', events, {'rows': len(events)})
+
+    df, summary = cache.get('key')
+    assert summary == {'rows': len(events)}
+    assert isinstance(df['content_id'].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(df, events)
+
+
+def test_hits_and_misses_are_counted(tmp_path, events):
+    cache = DatasetCache(str(tmp_path))
+    assert cache.get('key') is None
+    cache.put('key', events)
+    assert cache.get('key') is not None
+    assert cache.get('other') is None
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_eviction_drops_least_recently_used_first(tmp_path, events):
+    cache = DatasetCache(str(tmp_path))
+    for key in 'abc':
+        cache.put(key, events)
+    entry_size = os.path.getsize(os.path.join(str(tmp_path), 'a.arrow'))
+    # Recency comes from modification times: b is oldest, then c, then a
+    for when, key in enumerate('bca'):
+        os.utime(os.path.join(str(tmp_path), key + '.arrow'), (1_000 + when, 1_000 + when))
+
+    cache.max_bytes = 2 * entry_size
+    cache.evict()
+    assert cache.get('b') is None
+    assert cache.get('c') is not None
+    assert cache.get('a') is not None
+    assert cache.size_bytes() <= cache.max_bytes
+
+
+def test_datasets_larger_than_the_cache_are_not_stored(tmp_path, events):
+    cache = DatasetCache(str(tmp_path), max_bytes=1_000)
+    assert not cache.put('key', events)
+    assert cache.entries() == []
+    assert not [name for name in os.listdir(str(tmp_path)) if name.endswith('.tmp')]
+
+
+def test_content_key_depends_on_bytes_and_variant():
+    data = b'user_id,content_id\n1,Show_A\n'
+    assert content_key(data) == content_key(bytearray(data))
+    assert content_key(data) != content_key(data + b'2,Show_B\n')
+    assert content_key(data, 'sheet=1') != content_key(data, 'sheet=2')
+    assert content_key(data, 'sheet=1') == content_key(data, 'sheet=1')
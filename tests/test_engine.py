@@ -0,0 +1,47 @@
+import pandas as pd
+
+from aggregates import AggregateCache, RunningAggregates
+from engine import select_trending, velocity_section
+from generator import generate_events
+from windows import WindowedMetrics
+
+
+def test_trending_memo_follows_top_k():
+    df = generate_events(2000, contents=50, seed=1)
+    cache = AggregateCache()
+    exact = select_trending(RunningAggregates.from_frame(df), cache=cache, version='v1')
+    bounded = select_trending(RunningAggregates.from_frame(df, top_k=10), cache=cache, version='v1')
+    assert exact.tracked == 50
+    assert bounded.tracked == 10
+
+
+def views(title, counts, times):
+    """``counts[i]`` completed views of ``title`` at ``times[i]``"""
+    rows = [(title, time) for count, time in zip(counts, times) for _ in range(count)]
+    return pd.DataFrame({
+        'content_id': [title for title, _ in rows],
+        'timestamp': pd.to_datetime([time for _, time in rows]),
+        'watch_time': 30.0,
+        'is_completed': True,
+    })
+
+
+# One timestamp inside each of three consecutive 15-minute windows, oldest first
+WINDOW_TIMES = ['2024-04-01 12:05', '2024-04-01 12:20', '2024-04-01 12:40']
+
+
+def test_velocity_ranks_accelerating_title_above_steady_volume():
+    df = pd.concat([views('rising', [2, 6, 20], WINDOW_TIMES), views('steady', [40, 40, 40], WINDOW_TIMES)])
+    trending = velocity_section(WindowedMetrics.from_frame(df), minutes=15)
+    assert trending.shows.index.tolist() == ['rising', 'steady']
+    assert trending.shows.loc['steady', 'count'] > trending.shows.loc['rising', 'count']
+    assert trending.shows.loc['rising', 'acceleration'] > 0
+    assert trending.shows.loc['steady', 'growth'] == 0
+
+
+def test_velocity_of_empty_window_is_empty():
+    assert velocity_section(WindowedMetrics(), minutes=15).shows.empty
+    # Titles seen only before the current window are not trending now
+    df = pd.concat([views('old', [5], WINDOW_TIMES[:1]), views('new', [1], WINDOW_TIMES[2:])])
+    trending = velocity_section(WindowedMetrics.from_frame(df), minutes=15)
+    assert trending.shows.index.tolist() == ['new']
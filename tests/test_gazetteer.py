@@ -0,0 +1,33 @@
+from gazetteer import AhoCorasick, get_gazetteer, normalize_name
+
+
+def test_matches_whole_words_only():
+    matcher = AhoCorasick(['paris', 'rome'])
+    assert matcher.longest('comparison shopping') == -1
+    assert matcher.longest('romeo') == -1
+    assert matcher.longest('paris texas') == 0
+    assert matcher.longest('greater rome area') == 1
+
+
+def test_prefers_longest_pattern():
+    matcher = AhoCorasick(['york', 'new york', 'new york city'])
+    assert matcher.longest('new york') == 1
+    assert matcher.longest('downtown new york city') == 2
+    assert matcher.longest('york minster') == 0
+
+
+def test_failure_links_find_overlapping_patterns():
+    matcher = AhoCorasick(['san jose', 'jose', 'sans'])
+    assert matcher.longest('san san jose') == 0
+    assert matcher.longest('sanjose jose') == 1
+    assert matcher.longest('sa sans jose') == 2
+    assert matcher.longest('san josefina') == -1
+
+
+def test_gazetteer_resolves_aliases_and_substrings():
+    gazetteer = get_gazetteer()
+    cities = gazetteer.entries['city']
+    assert cities[gazetteer.lookup('city', 'Dallas, TX')] == 'Dallas'
+    assert cities[gazetteer.lookup('city', 'NYC')] == 'New York'
+    assert gazetteer.lookup('city', 'Comparison') == -1
+    assert normalize_name('  São  Paulo ') == 'sao paulo'
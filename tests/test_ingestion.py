@@ -0,0 +1,103 @@
+import pandas as pd
+
+from generator import generate_events
+from ingestion import ChunkedFrame, append_rows, as_frame, compact_dataset, memory_footprint
+
+
+def test_chunked_frame_appends_without_combining():
+    history = generate_events(500, seed=1)
+    data = ChunkedFrame.wrap(history)
+    batches = [generate_events(10, seed=seed) for seed in range(3)]
+    for batch in batches:
+        appended = data.append(batch)
+        assert appended is not data
+        data = appended
+    assert len(data) == 530
+    assert len(data.chunks) == 4
+
+    expected = history
+    for batch in batches:
+        expected = append_rows(expected, batch)
+    pd.testing.assert_frame_equal(data.frame(), expected)
+    assert as_frame(data) is data.frame()
+
+
+def test_chunked_frame_builds_on_combined_frame():
+    data = ChunkedFrame.wrap(generate_events(100, seed=1)).append(generate_events(10, seed=2))
+    combined = data.frame()
+    longer = data.append(generate_events(5, seed=3))
+    assert longer.chunks[0] is combined
+    assert len(longer.frame()) == 115
+    assert len(data.frame()) == 110
+
+
+def test_streaming_read_keeps_rows_with_odd_timestamps(tmp_path):
+    from ingestion import analyze_dataset, read_csv_chunked
+
+    path = tmp_path / 'events.csv'
+    path.write_text('user_id,content_id,watch_time,timestamp,device_type,location,is_completed\n'
+                    '1,Show_A,10,2024-02-20 10:00:00,tv,Chicago,true\n'
+                    '2,Show_B,20,02/20/2024 11:00,web,Chicago,false\n'
+                    '3,Show_A,30,not a time,tv,Paris,true\n')
+    df = read_csv_chunked(str(path), chunk_size=2)
+    assert len(df) == 3
+    assert df['timestamp'].tolist()[:2] == [pd.Timestamp('2024-02-20 10:00'), pd.Timestamp('2024-02-20 11:00')]
+    assert pd.isna(df['timestamp'].iloc[2])
+    analysis = analyze_dataset(df)
+    assert analysis['unparsed_timestamps'] == 1
+    assert analysis['date_range'] == '2024-02-20 to 2024-02-20'
+
+
+def plain_events(n_rows=2000):
+    """Synthetic events held with pandas' default dtypes, as a plain read_csv would give them"""
+    df = generate_events(n_rows, contents=20, seed=3)
+    df = df.astype({'content_id': object, 'device_type': object, 'location': object, 'watch_time': 'float64'})
+    df['referrer'] = [('search', 'home', 'email')[i % 3] for i in range(n_rows)]
+    df['session_id'] = [f'session-{i}' for i in range(n_rows)]
+    return df
+
+
+def test_compact_dataset_keeps_values():
+    df = plain_events()
+    compact = compact_dataset(df)
+    # watch_time is stored as float32, so compare it at that precision
+    pd.testing.assert_frame_equal(compact, df.astype({'watch_time': 'float32'}),
+                                  check_dtype=False, check_categorical=False)
+
+
+def test_compact_dataset_encodes_low_cardinality_text():
+    compact = compact_dataset(plain_events())
+    for col in ['content_id', 'device_type', 'location', 'referrer']:
+        assert isinstance(compact[col].dtype, pd.CategoricalDtype), col
+    assert compact['session_id'].dtype == object
+    assert compact['watch_time'].dtype == 'float32'
+    assert compact['user_id'].dtype.itemsize < 8
+
+
+def test_memory_footprint_reports_savings():
+    df = plain_events()
+    plain, compact = memory_footprint(df), memory_footprint(compact_dataset(df))
+    assert compact.loc['total', 'compact_bytes'] < plain.loc['total', 'compact_bytes']
+    assert compact.loc['total', 'compact_bytes'] < compact.loc['total', 'plain_bytes']
+    assert compact.loc['total', 'saved'] > 0
+    # The plain layout of a compact frame is costed like the original
+    assert abs(compact.loc['total', 'plain_bytes'] - plain.loc['total', 'plain_bytes']) \
+        < 0.05 * plain.loc['total', 'plain_bytes']
+
+
+def test_streaming_excel_matches_read_excel(tmp_path):
+    from ingestion import compact_dataset, normalize_dataset, read_excel_streaming, validate_columns
+
+    path = tmp_path / 'events.xlsx'
+    with pd.ExcelWriter(path) as writer:
+        pd.DataFrame({'note': ['not events']}).to_excel(writer, sheet_name='About', index=False)
+        generate_events(300, contents=20, seed=4).to_excel(writer, sheet_name='Events', index=False)
+
+    plain = pd.read_excel(path, sheet_name='Events')
+    # Both upload paths end with compact_dataset
+    expected = compact_dataset(normalize_dataset(plain, validate_columns(plain)[0]))
+    df = compact_dataset(read_excel_streaming(str(path), sheet_name='Events', chunk_size=64))
+    assert len(df) == len(plain) == 300
+    assert df.dtypes.astype(str).to_dict() == expected.dtypes.astype(str).to_dict()
+    pd.testing.assert_frame_equal(df.reset_index(drop=True), expected.reset_index(drop=True),
+                                  check_like=True, check_categorical=False)
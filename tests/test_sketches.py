@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from sketches import HyperLogLog
+
+
+def test_hyperloglog_estimate_within_error_bound():
+    for precision, distinct in [(10, 5_000), (12, 100_000), (14, 300_000)]:
+        sketch = HyperLogLog(precision).update(np.arange(distinct))
+        # Four standard errors: a failure here is a bug, not bad luck
+        assert abs(sketch.count() - distinct) / distinct < 4 * sketch.relative_error
+
+
+def test_hyperloglog_small_counts_use_linear_counting():
+    sketch = HyperLogLog(12).update(np.arange(100))
+    assert abs(sketch.count() - 100) <= 2
+
+
+def test_hyperloglog_ignores_duplicates():
+    once = HyperLogLog(12).update(np.arange(10_000))
+    repeated = HyperLogLog(12).update(np.tile(np.arange(10_000), 5))
+    np.testing.assert_array_equal(once.registers, repeated.registers)
+
+
+def test_hyperloglog_merge_equals_union():
+    rng = np.random.default_rng(0)
+    left, right = rng.integers(0, 50_000, 40_000), rng.integers(25_000, 75_000, 40_000)
+    merged = HyperLogLog(12).update(left).merge(HyperLogLog(12).update(right))
+    union = HyperLogLog(12).update(np.concatenate([left, right]))
+    np.testing.assert_array_equal(merged.registers, union.registers)
+    assert merged.count() == union.count()
+
+
+def test_hyperloglog_rejects_mismatched_precision():
+    with pytest.raises(ValueError):
+        HyperLogLog(10).merge(HyperLogLog(12))
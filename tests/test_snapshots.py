@@ -0,0 +1,58 @@
+from aggregates import RunningAggregates
+from generator import generate_events
+from snapshots import Snapshot, SnapshotIngestor
+from windows import WindowedMetrics
+
+
+def test_published_snapshots_are_never_modified():
+    df = generate_events(200, seed=1)
+    batches = iter([generate_events(50, seed=seed) for seed in range(2, 6)])
+    initial = Snapshot(df, RunningAggregates.from_frame(df), WindowedMetrics.from_frame(df), 'v0', 0.0)
+    ingestor = SnapshotIngestor(initial, lambda: next(batches), interval=3600)
+    try:
+        published = []
+        for _ in range(4):
+            ingestor.step()
+            published.append(ingestor.front)
+        assert [snapshot.running.rows for snapshot in published] == [250, 300, 350, 400]
+        assert [len(snapshot.data) for snapshot in published] == [250, 300, 350, 400]
+        assert initial.running.rows == 200
+        assert len({id(snapshot.running) for snapshot in published}) == 4
+    finally:
+        ingestor.stop()
+
+
+def test_publishing_does_not_copy_viewer_ids():
+    df = generate_events(200, seed=1)
+    batches = iter([generate_events(50, seed=seed) for seed in range(2, 4)])
+    initial = Snapshot(df, RunningAggregates.from_frame(df), WindowedMetrics.from_frame(df), 'v0', 0.0)
+    ingestor = SnapshotIngestor(initial, lambda: next(batches), interval=3600)
+    try:
+        ingestor.step()
+        first = ingestor.front
+        ingestor.step()
+        second = ingestor.front
+        # Views share the live id set instead of copying it, yet keep their own counts
+        assert first.running.viewers.source is second.running.viewers.source
+        assert len(first.running.viewers) < len(second.running.viewers) == len(second.running.viewers.source)
+        assert first.windows.window(60)['rows'] < second.windows.window(60)['rows']
+    finally:
+        ingestor.stop()
+
+
+def test_restarted_ingestor_takes_over_viewer_ids():
+    df = generate_events(200, seed=1)
+    batches = iter([generate_events(50, seed=seed) for seed in range(2, 5)])
+    initial = Snapshot(df, RunningAggregates.from_frame(df), WindowedMetrics.from_frame(df), 'v0', 0.0)
+    ingestor = SnapshotIngestor(initial, lambda: next(batches), interval=3600)
+    ingestor.step()
+    ingestor.stop()
+    successor = SnapshotIngestor(ingestor.front, lambda: next(batches), interval=3600)
+    try:
+        successor.step()
+        successor.step()
+        data = successor.front.data.frame()
+        assert len(successor.front.running.viewers) == data['user_id'].nunique()
+        assert successor.front.running.rows == len(data) == 350
+    finally:
+        successor.stop()
@@ -0,0 +1,114 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from generator import post_events
+from sources import EventListener, FileTailSource
+
+HEADER = 'user_id,content_id,watch_time,timestamp,device_type,location,is_completed\n'
+
+
+def line(user_id, watch_time='12.5'):
+    return f'{user_id},Show_A,{watch_time},2024-04-01 10:00:00,tv,Chicago,true\n'
+
+
+def test_bad_line_is_skipped_and_offset_moves_on(tmp_path):
+    path = tmp_path / 'events.csv'
+    path.write_text(HEADER + line(1) + line(2, 'twelve') + line(3))
+    source = FileTailSource(str(path), state_dir=str(tmp_path / 'offsets'))
+
+    batch = source.read()
+    assert batch['user_id'].tolist() == [1, 3]
+    assert source.skipped_lines == 1
+    assert source.offset == path.stat().st_size
+
+    with open(path, 'a') as file:
+        file.write(line(4))
+    assert source.read()['user_id'].tolist() == [4]
+    assert source.read().empty
+
+
+def test_jsonl_bad_line_is_skipped(tmp_path):
+    path = tmp_path / 'events.jsonl'
+    good = ('{"user_id": 1, "content_id": "Show_A", "watch_time": 3, "timestamp": "2024-04-01T10:00:00", '
+            '"device_type": "tv", "location": "Chicago", "is_completed": true}\n')
+    path.write_text(good + '{"user_id": \n' + good)
+    source = FileTailSource(str(path), state_dir=str(tmp_path / 'offsets'))
+    assert len(source.read()) == 2
+    assert source.skipped_lines == 1
+    assert source.offset == path.stat().st_size
+
+
+def test_new_source_resumes_from_saved_state(tmp_path):
+    path = tmp_path / 'events.csv'
+    path.write_text(HEADER + line(1) + line(2))
+    state_dir = str(tmp_path / 'offsets')
+    assert FileTailSource(str(path), state_dir=state_dir).read()['user_id'].tolist() == [1, 2]
+
+    with open(path, 'a') as file:
+        file.write(line(3))
+    restarted = FileTailSource(str(path), state_dir=state_dir)
+    assert restarted.pending_bytes == len(line(3))
+    assert restarted.read_to_end()['user_id'].tolist() == [3]
+    assert restarted.pending_bytes == 0
+
+
+def test_read_to_end_is_not_limited_to_one_batch(tmp_path):
+    path = tmp_path / 'events.csv'
+    path.write_text(HEADER + ''.join(line(user_id) for user_id in range(100)))
+    source = FileTailSource(str(path), state_dir=str(tmp_path / 'offsets'), max_batch_bytes=256)
+    assert len(source.read()) < 100
+    assert source.pending_bytes > 0
+    source.reset()
+    assert source.read_to_end()['user_id'].tolist() == list(range(100))
+    assert source.offset == path.stat().st_size
+
+
+@pytest.fixture
+def listener():
+    listener = EventListener(host='127.0.0.1', port=0, max_batches=1, put_timeout=0.1).start()
+    yield listener
+    listener.stop()
+
+
+def test_listener_delivers_posted_rows(listener):
+    rows, retries = post_events(f'http://127.0.0.1:{listener.port}/events', 50, batch_size=50, seed=1)
+    assert (rows, retries) == (50, 0)
+    events = listener.drain()
+    assert len(events) == 50
+    assert listener.rows_received == listener.rows_delivered == 50
+    assert listener.drain().empty
+
+
+def test_listener_rejects_when_full_and_sender_retries(listener):
+    url = f'http://127.0.0.1:{listener.port}/events'
+    result = []
+    sender = threading.Thread(target=lambda: result.append(post_events(url, 150, batch_size=50, seed=2)))
+    sender.start()
+    # Nothing is drained until the queue has overflowed once
+    deadline = time.monotonic() + 10
+    while not listener.batches_rejected and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert listener.batches_rejected
+
+    delivered = 0
+    while sender.is_alive() or delivered < 150:
+        delivered += len(listener.drain())
+        time.sleep(0.05)
+        assert time.monotonic() < deadline + 10
+    sender.join()
+    rows, retries = result[0]
+    assert rows == delivered == 150
+    assert retries == listener.batches_rejected
+
+
+def test_listener_answers_bad_body_with_400(listener):
+    url = f'http://127.0.0.1:{listener.port}/events'
+    for body in [b'not json', b'{"user_id": 1}']:
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(urllib.request.Request(url, data=body))
+        assert error.value.code == 400
+    assert listener.rows_received == 0
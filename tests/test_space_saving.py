@@ -0,0 +1,44 @@
+import numpy as np
+
+from sketches import SpaceSaving
+
+
+def zipf_keys(rng, size, keys=2_000):
+    return rng.zipf(1.3, size) % keys
+
+
+def check_space_saving(summary, keys):
+    values, counts = np.unique(keys, return_counts=True)
+    true = dict(zip(values, counts))
+    table = summary.table
+    assert len(table) <= summary.capacity
+    assert summary.total == len(keys)
+    # Every monitored count is an upper bound, off by at most its error
+    for key, row in table.iterrows():
+        assert row['count'] - row['error'] <= true.get(key, 0) <= row['count']
+    # Every key seen more than total / capacity times is monitored
+    frequent = values[counts > len(keys) / summary.capacity]
+    assert set(frequent) <= set(table.index)
+
+
+def test_space_saving_bounds_hold_across_batches():
+    rng = np.random.default_rng(3)
+    summary = SpaceSaving(50)
+    batches = [zipf_keys(rng, 5_000) for _ in range(10)]
+    for batch in batches:
+        summary.update(batch)
+    check_space_saving(summary, np.concatenate(batches))
+
+
+def test_space_saving_merge_bounds_hold_for_union():
+    rng = np.random.default_rng(4)
+    left, right = zipf_keys(rng, 20_000), (zipf_keys(rng, 20_000) + 7) % 2_000
+    merged = SpaceSaving(50).update(left[:10_000]).update(left[10_000:])
+    merged.merge(SpaceSaving(50).update(right[:10_000]).update(right[10_000:]))
+    check_space_saving(merged, np.concatenate([left, right]))
+
+
+def test_space_saving_sums_follow_keys():
+    summary = SpaceSaving(10, ['watch_time']).update(np.array(['a', 'b', 'a']), watch_time=[1.0, 2.0, 3.0])
+    assert summary.table.loc['a', 'watch_time'] == 4.0
+    assert summary.top(1).index.tolist() == ['a']
@@ -0,0 +1,31 @@
+import numpy as np
+
+from sketches import TDigest
+
+
+def test_tdigest_quantiles_within_tolerance():
+    values = np.random.default_rng(1).random(200_000)
+    digest = TDigest().update(values)
+    q = np.array([0.001, 0.01, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 0.999])
+    np.testing.assert_allclose(digest.quantile(q), np.quantile(values, q), atol=0.005)
+    assert digest.quantile(0) == values.min()
+    assert digest.quantile(1) == values.max()
+    assert digest.total == len(values)
+    assert len(digest.means) <= digest.compression
+
+
+def test_tdigest_merge_matches_single_digest():
+    rng = np.random.default_rng(2)
+    left, right = rng.normal(30, 10, 50_000), rng.exponential(20, 50_000)
+    merged = TDigest().update(left).merge(TDigest().update(right))
+    values = np.concatenate([left, right])
+    q = np.linspace(0.01, 0.99, 25)
+    spread = np.quantile(values, 0.99) - np.quantile(values, 0.01)
+    np.testing.assert_allclose(merged.quantile(q), np.quantile(values, q), atol=0.01 * spread)
+    assert merged.total == len(values)
+
+
+def test_tdigest_ignores_nan():
+    digest = TDigest().update([1.0, np.nan, 3.0])
+    assert digest.total == 2
+    assert digest.cdf(3.0) == 1.0
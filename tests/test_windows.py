@@ -0,0 +1,30 @@
+import pandas as pd
+
+from engine import window_section
+from windows import WindowedMetrics
+
+
+def events(timestamps):
+    return pd.DataFrame({
+        'content_id': ['a', 'b', 'a'][:len(timestamps)],
+        'timestamp': timestamps,
+        'watch_time': [10.0, 20.0, 30.0][:len(timestamps)],
+        'is_completed': [True, False, True][:len(timestamps)],
+        'user_id': [1, 2, 3][:len(timestamps)],
+    })
+
+
+def test_unparseable_timestamps_leave_windows_empty():
+    windows = WindowedMetrics.from_frame(events(['n/a', 'n/a', 'n/a']))
+    assert windows.head is None
+    assert windows.window(5) is None
+    assert window_section(windows, 5) is None
+    assert windows.content_activity(5).empty
+
+
+def test_windows_start_once_a_timestamp_parses():
+    windows = WindowedMetrics.from_frame(events(['n/a', 'n/a']))
+    windows.update(events(['2024-04-01 10:00:00', '2024-04-01 10:01:00', 'n/a']))
+    current = windows.window(5)
+    assert current['rows'] == 2
+    assert current['avg_watch_time'] == 15.0
@@ -0,0 +1,185 @@
+"""Sliding time-window metrics over a ring buffer of per-minute buckets"""
+import copy
+
+import numpy as np
+import pandas as pd
+
+from sketches import HyperLogLog, hash_values
+
+DEFAULT_BUCKET_SECONDS = 60
+# Three hours of minute buckets: a 60-minute window and the two before it
+DEFAULT_BUCKETS = 180
+# Windowed viewer counts are estimates in every mode: exact per-bucket id sets would grow with the audience
+WINDOW_HLL_PRECISION = 12
+CONTENT_COLUMNS = ['views', 'completed', 'watch_time']
+
+
+class WindowedMetrics:
+    """Per-bucket counts, watch-time sums, completions, viewers and per-title stats
+
+    Buckets live in a fixed-size ring indexed by absolute bucket number, so
+    memory is bounded and every window query touches at most ``n_buckets``
+    slots regardless of how many rows were ingested. "Now" is the newest
+    bucket seen, which keeps historical uploads meaningful.
+    """
+
+    def __init__(self, bucket_seconds=DEFAULT_BUCKET_SECONDS, n_buckets=DEFAULT_BUCKETS):
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.head = None
+        self.has_user_id = False
+        self.rows = np.zeros(n_buckets, dtype=np.int64)
+        self.watch_time_sum = np.zeros(n_buckets)
+        self.watch_time_count = np.zeros(n_buckets, dtype=np.int64)
+        self.completed = np.zeros(n_buckets, dtype=np.int64)
+        self.viewers = [HyperLogLog(WINDOW_HLL_PRECISION) for _ in range(n_buckets)]
+        # Per-title views, completions and watch-time sums for each bucket
+        self.content = [None] * n_buckets
+
+    @classmethod
+    def from_frame(cls, df, **options):
+        windows = cls(**options)
+        windows.update(df)
+        return windows
+
+    def view(self):
+        """Independent copy for publishing; its size is fixed by the ring, not by the rows ingested"""
+        view = copy.copy(self)
+        view.rows = self.rows.copy()
+        view.watch_time_sum = self.watch_time_sum.copy()
+        view.watch_time_count = self.watch_time_count.copy()
+        view.completed = self.completed.copy()
+        view.viewers = [sketch.copy() for sketch in self.viewers]
+        # Per-title frames are replaced on update, never modified
+        view.content = list(self.content)
+        return view
+
+    def _clear(self, bucket):
+        slot = bucket % self.n_buckets
+        self.rows[slot] = 0
+        self.watch_time_sum[slot] = 0.0
+        self.watch_time_count[slot] = 0
+        self.completed[slot] = 0
+        self.viewers[slot] = HyperLogLog(WINDOW_HLL_PRECISION)
+        self.content[slot] = None
+
+    def _advance(self, head):
+        """Move "now" forward, recycling slots that fall out of the ring"""
+        if self.head is None or head - self.head >= self.n_buckets:
+            for bucket in range(head - self.n_buckets + 1, head + 1):
+                self._clear(bucket)
+        else:
+            for bucket in range(self.head + 1, head + 1):
+                self._clear(bucket)
+        self.head = head
+
+    def update(self, delta):
+        """Fold a batch of events into their time buckets"""
+        if len(delta) == 0:
+            return self
+        timestamps = delta['timestamp']
+        if not pd.api.types.is_datetime64_any_dtype(timestamps):
+            timestamps = pd.to_datetime(timestamps, errors='coerce')
+        seconds = timestamps.to_numpy(dtype='datetime64[s]').astype(np.int64)
+        valid = ~timestamps.isna().to_numpy()
+        buckets = seconds // self.bucket_seconds
+
+        if valid.any():
+            newest = int(buckets[valid].max())
+            if self.head is None or newest > self.head:
+                self._advance(newest)
+        if self.head is None:
+            # No event has had a parseable timestamp yet
+            return self
+        # Events older than the ring are dropped
+        keep = valid & (buckets > self.head - self.n_buckets)
+        if not keep.any():
+            return self
+
+        buckets = buckets[keep]
+        offsets = (buckets - (self.head - self.n_buckets + 1)).astype(np.intp)
+        slots = (buckets % self.n_buckets).astype(np.intp)
+        watch_time = delta['watch_time'].to_numpy(dtype=np.float64)[keep]
+        has_watch_time = ~np.isnan(watch_time)
+        completed = delta['is_completed'].astype(bool).to_numpy()[keep]
+
+        # Per-bucket totals in one bincount each, then scattered into the ring slots
+        size = self.n_buckets
+        slot_of_offset = (np.arange(size) + self.head - self.n_buckets + 1) % self.n_buckets
+        self.rows[slot_of_offset] += np.bincount(offsets, minlength=size)
+        self.watch_time_sum[slot_of_offset] += np.bincount(offsets, weights=np.where(has_watch_time, watch_time, 0.0),
+                                                           minlength=size)
+        self.watch_time_count[slot_of_offset] += np.bincount(offsets, weights=has_watch_time, minlength=size).astype(np.int64)
+        self.completed[slot_of_offset] += np.bincount(offsets, weights=completed, minlength=size).astype(np.int64)
+
+        # Per-title stats for every (bucket, title) pair in one group-by
+        pairs = pd.DataFrame({
+            'views': 1,
+            'completed': completed.astype(np.int64),
+            'watch_time': np.where(has_watch_time, watch_time, 0.0),
+        }).groupby([slots, delta['content_id'].to_numpy()[keep].astype(str)]).sum()
+        for slot, stats in pairs.groupby(level=0):
+            stats = stats.droplevel(0)
+            current = self.content[slot]
+            self.content[slot] = stats if current is None else current.add(stats, fill_value=0)
+
+        # Viewer sketches, one vectorized update per occupied bucket
+        if 'user_id' in delta.columns:
+            self.has_user_id = True
+            hashes = hash_values(delta['user_id'].to_numpy()[keep])
+            order = np.argsort(slots, kind='stable')
+            occupied, starts = np.unique(slots[order], return_index=True)
+            bounds = np.append(starts, len(order))
+            for slot, start, stop in zip(occupied, bounds[:-1], bounds[1:]):
+                self.viewers[slot].update_hashes(hashes[order[start:stop]])
+        return self
+
+    def _slots(self, minutes, offset=0):
+        """Ring slots covering ``minutes`` ending ``offset`` minutes before now"""
+        count = max(int(minutes * 60 // self.bucket_seconds), 1)
+        end = self.head - int(offset * 60 // self.bucket_seconds)
+        start = max(end - count + 1, self.head - self.n_buckets + 1)
+        return [bucket % self.n_buckets for bucket in range(start, end + 1)]
+
+    def window(self, minutes, offset=0):
+        """Metrics over the last ``minutes`` (shifted back by ``offset`` minutes)"""
+        if self.head is None:
+            return None
+        slots = self._slots(minutes, offset)
+        rows = int(self.rows[slots].sum())
+        watch_time_count = int(self.watch_time_count[slots].sum())
+        viewers = HyperLogLog(WINDOW_HLL_PRECISION)
+        for slot in slots:
+            viewers.merge(self.viewers[slot])
+        return {
+            'rows': rows,
+            # Without viewer ids every event counts as a viewer, as in RunningAggregates
+            'viewers': viewers.count() if self.has_user_id else rows,
+            'viewers_error': viewers.relative_error if self.has_user_id else 0.0,
+            'avg_watch_time': self.watch_time_sum[slots].sum() / watch_time_count if watch_time_count else float('nan'),
+            'completion_rate': (self.completed[slots].sum() / rows) * 100 if rows else 0.0,
+        }
+
+    def compare(self, minutes):
+        """Metrics for the last ``minutes`` and for the window just before it"""
+        return self.window(minutes), self.window(minutes, offset=minutes)
+
+    def content_activity(self, minutes, periods=3):
+        """Per-title stats for the last ``periods`` consecutive windows of ``minutes``
+
+        Returns a frame indexed by title with a ``(stat, period)`` column for
+        each of ``CONTENT_COLUMNS``, where period 0 is the newest window.
+        """
+        columns = pd.MultiIndex.from_product([CONTENT_COLUMNS, range(periods)])
+        if self.head is None:
+            return pd.DataFrame(columns=columns, dtype='float64')
+        frames, keys = [], []
+        for period in range(periods):
+            for slot in self._slots(minutes, offset=minutes * period):
+                if self.content[slot] is not None:
+                    frames.append(self.content[slot])
+                    keys.append(period)
+        if not frames:
+            return pd.DataFrame(columns=columns, dtype='float64')
+        activity = pd.concat(frames, keys=keys).groupby(level=[1, 0]).sum().unstack(fill_value=0)
+        return activity.reindex(columns=columns, fill_value=0).astype('float64')